@@ -0,0 +1,234 @@
+# 🚨 Incremental alert engine with per-SKU thresholds
+#
+# Low stock (Current Stock below a threshold) and high gap (Gap to Fulfill above
+# a threshold) used to be hard-coded at 20 / 100 and recomputed with full scans
+# on every rerun. Thresholds now come from alert_thresholds.csv, where a row can
+# target one City + Product line, a whole city or product ("*"), or everything:
+#
+#   City,Product line,Low Stock Below,High Gap Above
+#   *,*,20,100
+#   Mumbai,*,30,
+#   *,Amul Butter,,80
+#   Mumbai,Amul Butter,50,60
+#
+# The most specific row wins per column (pair > city > product > default); an
+# empty cell falls through to the next level.
+#
+# `AlertEngine` scores every active row once, then keeps alert counts and two
+# heaps (lowest stock among low-stock rows, largest gap among high-gap rows) up
+# to date as edits come in. An edit is O(log n): the row's version is bumped and
+# a fresh heap entry pushed; stale entries are skipped when read and dropped
+# when they outnumber live ones.
+
+import csv
+import heapq
+import os
+
+import numpy as np
+import pandas as pd
+
+from file_lock import locked
+
+THRESHOLDS_FILE = os.environ.get("ALERT_THRESHOLDS_FILE", "alert_thresholds.csv")
+DEFAULT_LOW_STOCK = 20
+DEFAULT_HIGH_GAP = 100
+ANY = "*"
+THRESHOLD_COLUMNS = ['City', 'Product line', 'Low Stock Below', 'High Gap Above']
+
+
+def _text(value):
+    return "" if value is None or pd.isna(value) else str(value).strip()
+
+
+def _number(value):
+    value = _text(value)
+    return float(value) if value else None
+
+
+class Thresholds:
+    def __init__(self, rules=None, low=DEFAULT_LOW_STOCK, gap=DEFAULT_HIGH_GAP):
+        self.low = low
+        self.gap = gap
+        self.rules = {}  # (city, product) -> (low or None, gap or None)
+        for city, product, rule_low, rule_gap in rules or []:
+            if city == ANY and product == ANY:
+                self.low = rule_low if rule_low is not None else self.low
+                self.gap = rule_gap if rule_gap is not None else self.gap
+            else:
+                self.rules[(city, product)] = (rule_low, rule_gap)
+
+    @property
+    def version(self):
+        return hash((self.low, self.gap, tuple(sorted(self.rules.items()))))
+
+    def _lookups(self, col):
+        by_city, by_product, by_pair = {}, {}, {}
+        for (city, product), values in self.rules.items():
+            if values[col] is None:
+                continue
+            if product == ANY:
+                by_city[city] = values[col]
+            elif city == ANY:
+                by_product[product] = values[col]
+            else:
+                by_pair[(city, product)] = values[col]
+        return by_city, by_product, by_pair
+
+    def _resolve(self, frame, col, default):
+        out = np.full(len(frame), float(default))
+        by_city, by_product, by_pair = self._lookups(col)
+        cities = frame['City'].astype(str)
+        products = frame['Product line'].astype(str)
+        for lookup, keys in ((by_product, products), (by_city, cities)):
+            if lookup:
+                hit = keys.map(lookup).to_numpy(dtype=float)
+                out = np.where(np.isnan(hit), out, hit)
+        if by_pair:
+            pairs = pd.MultiIndex.from_arrays([cities, products])
+            hit = pd.Series(by_pair, dtype=float).reindex(pairs).to_numpy()
+            out = np.where(np.isnan(hit), out, hit)
+        return out
+
+    # (low stock threshold, high gap threshold) arrays aligned with `frame` rows
+    def resolve(self, frame):
+        return self._resolve(frame, 0, self.low), self._resolve(frame, 1, self.gap)
+
+    def table(self):
+        rows = [{'City': ANY, 'Product line': ANY, 'Low Stock Below': self.low, 'High Gap Above': self.gap}]
+        for (city, product), (low, gap) in sorted(self.rules.items()):
+            rows.append({'City': city, 'Product line': product, 'Low Stock Below': low, 'High Gap Above': gap})
+        return pd.DataFrame(rows, columns=THRESHOLD_COLUMNS)
+
+    @classmethod
+    def from_table(cls, table):
+        rules = []
+        for row in table.to_dict(orient='records'):
+            city = _text(row.get('City')) or ANY
+            product = _text(row.get('Product line')) or ANY
+            rules.append((city, product, _number(row.get('Low Stock Below')), _number(row.get('High Gap Above'))))
+        return cls(rules)
+
+
+# Parsed thresholds per path, re-read only when the file's mtime/size changes
+_loaded = {}
+
+
+def _file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_thresholds(path=THRESHOLDS_FILE):
+    stamp = _file_stamp(path)
+    cached = _loaded.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    thresholds = Thresholds()
+    if stamp is not None:
+        with open(path, newline='', encoding='utf-8') as f:
+            thresholds = Thresholds.from_table(pd.DataFrame(list(csv.DictReader(f))))
+    _loaded[path] = (stamp, thresholds)
+    return thresholds
+
+
+def save_thresholds(thresholds, path=THRESHOLDS_FILE):
+    with locked(path):
+        thresholds.table().to_csv(path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
+
+
+class AlertEngine:
+    def __init__(self, df, thresholds=None):
+        self.thresholds = thresholds or Thresholds()
+        self.index = pd.Index(df.index)
+        self.low_limit, self.gap_limit = self.thresholds.resolve(df)
+        self.needed = df['Needed Stock'].to_numpy(dtype=float, copy=True)
+        self.stock = df['Current Stock'].to_numpy(dtype=float, copy=True)
+        self.active = (df['Status'] != "Completed").to_numpy(copy=True)
+        self.version = np.zeros(len(df), dtype=np.int64)
+
+        self.low = self.active & (self.stock < self.low_limit)
+        self.high = self.active & (self.needed - self.stock > self.gap_limit)
+        self.low_count = int(self.low.sum())
+        self.high_count = int(self.high.sum())
+        self._rebuild()
+
+    def _rebuild(self):
+        low_pos = np.flatnonzero(self.low)
+        high_pos = np.flatnonzero(self.high)
+        gaps = self.needed[high_pos] - self.stock[high_pos]
+        self._low_heap = list(zip(self.stock[low_pos].tolist(), low_pos.tolist(), self.version[low_pos].tolist()))
+        self._gap_heap = list(zip((-gaps).tolist(), high_pos.tolist(), self.version[high_pos].tolist()))
+        heapq.heapify(self._low_heap)
+        heapq.heapify(self._gap_heap)
+
+    # Apply edited rows (index = row ids; Current Stock / Status / Needed Stock).
+    # Returns (row id, 'low_stock' | 'high_gap') for every alert the edits raised.
+    def apply(self, rows):
+        positions = self.index.get_indexer(rows.index)
+        columns = {c: rows[c].to_numpy() for c in ('Current Stock', 'Status', 'Needed Stock') if c in rows.columns}
+        crossed = []
+        for i, pos in enumerate(positions):
+            if pos >= 0:
+                raised = self._update(pos, {c: values[i] for c, values in columns.items()})
+                crossed += [(self.index[pos], kind) for kind in raised]
+        if len(self._low_heap) > 2 * self.low_count + 64 or len(self._gap_heap) > 2 * self.high_count + 64:
+            self._rebuild()
+        return crossed
+
+    def _update(self, pos, values):
+        if 'Current Stock' in values:
+            self.stock[pos] = float(values['Current Stock'])
+        if 'Needed Stock' in values:
+            self.needed[pos] = float(values['Needed Stock'])
+        if 'Status' in values:
+            self.active[pos] = values['Status'] != "Completed"
+        self.version[pos] += 1
+        version = int(self.version[pos])
+        stock, gap = self.stock[pos], self.needed[pos] - self.stock[pos]
+
+        low = bool(self.active[pos] and stock < self.low_limit[pos])
+        high = bool(self.active[pos] and gap > self.gap_limit[pos])
+        raised = [kind for kind, now, before in (('low_stock', low, self.low[pos]), ('high_gap', high, self.high[pos])) if now and not before]
+        self.low_count += int(low) - int(self.low[pos])
+        self.high_count += int(high) - int(self.high[pos])
+        self.low[pos], self.high[pos] = low, high
+        if low:
+            heapq.heappush(self._low_heap, (float(stock), pos, version))
+        if high:
+            heapq.heappush(self._gap_heap, (float(-gap), pos, version))
+        return raised
+
+    def _top(self, heap, k):
+        taken = []
+        while heap and (k is None or len(taken) < k):
+            entry = heapq.heappop(heap)
+            if entry[2] == self.version[entry[1]]:
+                taken.append(entry)
+        for entry in taken:
+            heapq.heappush(heap, entry)
+        return [self.index[pos] for _, pos, _ in taken]
+
+    # Row ids of low-stock rows, lowest stock first (all of them if k is None)
+    def lowest_stock(self, k=None):
+        return self._top(self._low_heap, k)
+
+    # Row ids of the k high-gap rows with the largest Gap to Fulfill
+    def top_gaps(self, k=10):
+        return self._top(self._gap_heap, k)
+
+    def counts(self):
+        return {'low_stock': self.low_count, 'high_gap': self.high_count}
+
+
+# Gap to Fulfill + Low Stock / High Gap flags for every row of `frame`
+def flag_alerts(frame, thresholds):
+    frame = frame.copy()
+    low, gap = thresholds.resolve(frame)
+    frame['Gap to Fulfill'] = frame['Needed Stock'] - frame['Current Stock']
+    frame['Low Stock'] = frame['Current Stock'].to_numpy() < low
+    frame['High Gap'] = frame['Gap to Fulfill'].to_numpy() > gap
+    return frame
@@ -2,6 +2,10 @@ import streamlit as st
 import pandas as pd
 import datetime
 import plotly.express as px
+from alert_engine import load_thresholds, flag_alerts
+from csv_ingest import IngestError, read_upload
+from exporter import DEFAULT_FORMAT, FORMATS, available_formats, export_bytes, export_filename
+from history_store import open_history
 
 st.set_page_config(page_title="Smart Stock Dashboard", layout="wide")
 
@@ -13,20 +17,28 @@ page = st.sidebar.radio("📊 Navigate", [
 ])
 uploaded_file = st.sidebar.file_uploader("📁 Upload Walmart CSV", type=["csv"])
 
-history_file = "stock_history.csv"
-try:
-    history_df = pd.read_csv(history_file)
-    if 'Completed At' in history_df.columns:
-        history_df['Completed At'] = pd.to_datetime(history_df['Completed At'])
-except FileNotFoundError:
-    history_df = pd.DataFrame()
+# 🗃️ Month-partitioned history store (only the partitions a query needs are read)
+@st.cache_resource
+def get_history_store():
+    return open_history()
+
+history_store = get_history_store()
 
 if uploaded_file:
+    # 🧾 Schema-checked, multithreaded CSV ingest: bad rows are reported, not fatal
     @st.cache_data
-    def load_data(file):
-        return pd.read_csv(file)
-
-    df = load_data(uploaded_file)
+    def load_data(data, name):
+        return read_upload(data, name)
+
+    try:
+        df, rejected = load_data(uploaded_file.getvalue(), uploaded_file.name)
+    except IngestError as exc:
+        st.error(f"❌ {uploaded_file.name} can't be used: {exc}")
+        st.stop()
+    if len(rejected):
+        st.warning(f"⚠️ {len(rejected)} rows failed validation and were left out.")
+        with st.expander("🧾 Rejected rows"):
+            st.dataframe(rejected.head(1000), use_container_width=True)
 
     if 'Status' not in df.columns:
         df['Status'] = 'Pending'
@@ -37,13 +49,16 @@ if uploaded_file:
     df['Needed Stock'] = df['Predicted Quantity']
     df['Gap to Fulfill'] = df['Needed Stock'] - df['Current Stock']
 
-    # 🔔 Alert Summary in Sidebar
-    low_stock_count = df[df['Current Stock'] < 20].shape[0]
-    high_gap_count = df[df['Gap to Fulfill'] > 100].shape[0]
+    # 🔔 Alert Summary in Sidebar (per-City/Product thresholds from alert_thresholds.csv)
+    thresholds = load_thresholds()
+    flags = flag_alerts(df, thresholds)
+    active = df['Status'] != "Completed"
+    low_stock_count = int((flags['Low Stock'] & active).sum())
+    high_gap_count = int((flags['High Gap'] & active).sum())
 
     with st.sidebar.expander("🚨 Alerts Summary"):
-        st.markdown(f"🔴 **Low Stock Items (<20)**: {low_stock_count}")
-        st.markdown(f"⚠️ **High Gap Items (>100)**: {high_gap_count}")
+        st.markdown(f"🔴 **Low Stock Items**: {low_stock_count}")
+        st.markdown(f"⚠️ **High Gap Items**: {high_gap_count}")
 
     # ====================
     # 📦 PENDING ORDERS
@@ -61,6 +76,7 @@ if uploaded_file:
             pending_df['Product line'].str.contains(search_product, case=False, na=False) &
             pending_df['City'].str.contains(search_city, case=False, na=False)
         ].copy().reset_index(drop=True)
+        low_limit, gap_limit = thresholds.resolve(filtered_df)
 
         st.markdown("Showing up to 20 editable orders to prevent lag ⚡")
         updated_rows = []
@@ -93,9 +109,9 @@ if uploaded_file:
 
                 # 🚨 Conditional Alerts
                 alert_msg = ""
-                if filtered_df.at[i, 'Current Stock'] < 20:
+                if filtered_df.at[i, 'Current Stock'] < low_limit[i]:
                     alert_msg += "🔴 **Low Stock!** "
-                if filtered_df.at[i, 'Gap to Fulfill'] > 100:
+                if filtered_df.at[i, 'Gap to Fulfill'] > gap_limit[i]:
                     alert_msg += "⚠️ **High Gap!**"
 
                 if alert_msg:
@@ -111,8 +127,7 @@ if uploaded_file:
 
                 if not completed_df.empty:
                     completed_df['Completed At'] = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    history_df = pd.concat([history_df, completed_df], ignore_index=True)
-                    history_df.to_csv(history_file, index=False)
+                    history_store.append(completed_df)
 
                 df = still_pending_df.copy()
         else:
@@ -127,11 +142,11 @@ if uploaded_file:
     elif page == "🚨 Low Stock Alerts":
         st.title("🚨 Low Stock Alerts")
 
-        alert_df = df[(df['Current Stock'] < 20) & (df['Status'] != "Completed")].copy()
+        alert_df = df[flags['Low Stock'] & active].copy()
         alert_df = alert_df.sort_values(by='Current Stock')
 
         if not alert_df.empty:
-            st.subheader("🧯 Items with Stock < 20")
+            st.subheader("🧯 Items Below Their Stock Threshold")
             st.dataframe(alert_df, use_container_width=True)
         else:
             st.success("✅ No critical low-stock items right now!")
@@ -142,19 +157,16 @@ if uploaded_file:
     elif page == "🗃️ History":
         st.title("🗃️ Completed Orders History")
 
-        if not history_df.empty:
-            history_df['Completed At'] = pd.to_datetime(history_df['Completed At'])
-            min_date = history_df['Completed At'].min().date()
-            max_date = history_df['Completed At'].max().date()
+        bounds = history_store.bounds()
+        if bounds:
+            min_date = bounds[0].date()
+            max_date = bounds[1].date()
 
             date_range = st.date_input("📅 Filter by Completion Date", (min_date, max_date))
 
             if isinstance(date_range, tuple) and len(date_range) == 2:
                 start_date, end_date = date_range
-                filtered_history = history_df[
-                    (history_df['Completed At'].dt.date >= start_date) &
-                    (history_df['Completed At'].dt.date <= end_date)
-                ]
+                filtered_history = history_store.query_dates(start_date, end_date)
                 st.dataframe(filtered_history, use_container_width=True)
             else:
                 st.warning("Please select a valid date range.")
@@ -197,8 +209,11 @@ if uploaded_file:
         else:
             st.warning("No data to display in pie chart.")
 
-    # 📥 Download Updated Data
-    st.sidebar.download_button("💾 Download Updated Data", df.to_csv(index=False), "updated_stock_data.csv", "text/csv")
+    # 📥 Download Updated Data (serialized only when clicked, cached per data version)
+    formats = available_formats()
+    export_format = st.sidebar.selectbox("💾 Export format", formats, index=formats.index(DEFAULT_FORMAT), format_func=lambda f: FORMATS[f][0])
+    st.sidebar.download_button("💾 Download Updated Data", lambda df=df, fmt=export_format: export_bytes(df, fmt),
+                               export_filename("updated_stock_data", export_format), FORMATS[export_format][2])
 
 else:
     st.info("📥 Please upload your cleaned Walmart dataset to begin.")
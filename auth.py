@@ -1,39 +1,73 @@
-import streamlit as st
-import pandas as pd
+import csv
 import hashlib
+import os
+import threading
+
+from file_lock import locked
 
 USERS_FILE = "users.csv"
+FIELDS = ["Username", "Password", "Role"]
+
+# In-memory username -> (hash, role) map, rebuilt only when users.csv changes
+_users = {}
+_users_stamp = None
+_users_lock = threading.Lock()
 
 # Hashing passwords
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
-# Load users
-def load_users():
+def _file_stamp():
     try:
-        return pd.read_csv(USERS_FILE)
+        stat = os.stat(USERS_FILE)
     except FileNotFoundError:
-        return pd.DataFrame(columns=["Username", "Password", "Role"])
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
 
-# Save users
-def save_users(users_df):
-    users_df.to_csv(USERS_FILE, index=False)
+# Load users (cached; re-read only when the file's mtime/size changes)
+def load_users():
+    global _users, _users_stamp
+    stamp = _file_stamp()
+    if stamp == _users_stamp:
+        return _users
+
+    with _users_lock:
+        stamp = _file_stamp()
+        if stamp != _users_stamp:
+            users = {}
+            if stamp is not None:
+                with open(USERS_FILE, newline="", encoding="utf-8") as f:
+                    for row in csv.DictReader(f):
+                        users[row["Username"]] = (row["Password"], row["Role"])
+            _users, _users_stamp = users, stamp
+        return _users
 
 # Login logic
 def login_user(username, password):
-    users = load_users()
-    hashed = hash_password(password)
-    user = users[(users["Username"] == username) & (users["Password"] == hashed)]
-    if not user.empty:
-        return user.iloc[0]["Role"]
+    user = load_users().get(username)
+    if user and user[0] == hash_password(password):
+        return user[1]
     return None
 
-# Register new user
+# Register new user (append one line under a file lock; never rewrite the file)
 def register_user(username, password, role):
-    users = load_users()
-    if username in users["Username"].values:
-        return False
-    new_user = pd.DataFrame([[username, hash_password(password), role]], columns=["Username", "Password", "Role"])
-    users = pd.concat([users, new_user], ignore_index=True)
-    save_users(users)
+    with locked(USERS_FILE):
+        # Re-check under the lock so two concurrent sign-ups can't both win
+        if username in load_users():
+            return False
+
+        new_file = not os.path.exists(USERS_FILE) or os.path.getsize(USERS_FILE) == 0
+        needs_newline = False
+        if not new_file:
+            with open(USERS_FILE, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+
+        with open(USERS_FILE, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            if new_file:
+                writer.writerow(FIELDS)
+            elif needs_newline:
+                f.write("\n")
+            writer.writerow([username, hash_password(password), role])
     return True
@@ -0,0 +1,312 @@
+# ⏱️ Pipeline benchmark suite with machine-readable baselines
+#
+# Times every hot stage of the dashboard on a dataset of any size (synthetic data
+# is generated on demand) and records peak traced memory per stage. Results are
+# written as JSON so later runs can be checked against a saved baseline.
+#
+# Each stage is run --repeat times and its best time is recorded, so a single
+# noisy run doesn't trip the check. --check fails when a stage's time or traced
+# peak grows past --tolerance / --memory-tolerance.
+#
+# Usage:
+#   python benchmark.py --rows 1000000                         # writes benchmarks/1000000rows.json
+#   python benchmark.py --rows 1000000 --check benchmarks/1000000rows.json
+#   python benchmark.py --data my_export.csv --label store42 --no-memory
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from alert_engine import AlertEngine
+from compact_schema import compact
+from csv_ingest import ingest_csv
+from feature_store import FeatureStore
+from history_store import HistoryStore
+from inventory_cube import InventoryCube
+from model_registry import load_bundle
+from scoring import DATE_FORMAT
+from search_index import SearchIndex
+from synth_data import generate
+
+BENCH_DIR = "benchmarks"
+HISTORY_BATCH = 100
+ALERT_EDITS = 100
+
+
+# ---------- stages: each takes and extends a shared context dict ----------
+def stage_csv_load(ctx):
+    ctx['raw'] = pd.read_csv(ctx['path'])
+
+
+def stage_csv_ingest(ctx):
+    # The dashboard's upload path: typed multithreaded read + validation + compact
+    ctx['ingested'], ctx['rejected'] = ingest_csv(ctx['path'])
+
+
+def stage_compact_schema(ctx):
+    ctx['df'] = compact(ctx['raw'].copy())
+
+
+def stage_date_features(ctx):
+    df = ctx['df']
+    df['Date'] = pd.to_datetime(df['Date'], format=DATE_FORMAT)
+    df['Year'] = df['Date'].dt.year
+    df['Month'] = df['Date'].dt.month
+    df['Day'] = df['Date'].dt.day
+    df['Weekday'] = df['Date'].dt.weekday
+
+
+def stage_encode(ctx):
+    df, bundle = ctx['df'], ctx['bundle']
+    df['City_encoded'] = bundle['city_encoder'].transform(df['City'])
+    df['Product_encoded'] = bundle['product_encoder'].transform(df['Product line'])
+
+
+def stage_demand_features(ctx):
+    # The bundle's store when it has one; otherwise time building one from the data
+    df, store = ctx['df'], ctx['bundle'].get('feature_store')
+    store = store.extended(df) if store is not None else FeatureStore.from_frame(df)
+    demand = store.features(df)
+    df[demand.columns] = demand
+
+
+def stage_predict(ctx):
+    df, bundle = ctx['df'], ctx['bundle']
+    df['Predicted Quantity'] = bundle['model'].predict(df[bundle['features']])
+    df['Needed Stock'] = df['Predicted Quantity']
+    df['Status'] = 'Pending'
+    df['Gap to Fulfill'] = df['Needed Stock'] - df['Current Stock']
+
+
+def stage_pending_filter_scan(ctx):
+    df = ctx['df']
+    pending = df[df['Status'] != "Completed"]
+    ctx['scan_hits'] = int((
+        pending['Product line'].str.contains("o", case=False, na=False) &
+        pending['City'].str.contains("i", case=False, na=False)
+    ).sum())
+
+
+def stage_search_index_build(ctx):
+    ctx['index'] = SearchIndex(ctx['df'])
+
+
+def stage_search_index_query(ctx):
+    mask = ctx['index'].match({'Product line': "o", 'City': "i"})
+    ctx['index_hits'] = int((mask & (ctx['df']['Status'] != "Completed").to_numpy()).sum())
+
+
+def stage_low_stock(ctx):
+    df = ctx['df']
+    alert_df = df[(df['Current Stock'] < 20) & (df['Status'] != "Completed")]
+    alert_df.sort_values(by='Current Stock')
+
+
+def stage_alerts_build(ctx):
+    ctx['alerts'] = AlertEngine(ctx['df'])
+
+
+def stage_alerts_edit(ctx):
+    rows = ctx['df'].head(ALERT_EDITS)[['Current Stock', 'Status', 'Needed Stock']].copy()
+    rows['Current Stock'] = 0
+    for i in range(len(rows)):
+        ctx['alerts'].apply(rows.iloc[i:i + 1])
+    ctx['alerts'].lowest_stock(100)
+    ctx['alerts'].top_gaps(10)
+
+
+def stage_analysis_groupby(ctx):
+    active = ctx['df'][ctx['df']['Status'] != "Completed"].copy()
+    active.groupby('Product line', observed=True)[['Needed Stock', 'Current Stock']].sum()
+    active.groupby('Product line', observed=True)['Needed Stock'].sum()
+    active.groupby('Date')['Needed Stock'].sum()
+    active['Week'] = active['Date'].dt.to_period('W').astype(str)
+    active.groupby('Week')['Needed Stock'].sum()
+    active['Month_Year'] = active['Date'].dt.to_period('M').astype(str)
+    active.groupby('Month_Year')['Needed Stock'].sum()
+
+
+def stage_cube_build(ctx):
+    ctx['cube'] = InventoryCube(ctx['df'])
+    ctx['cube'].rollup('W')
+    ctx['cube'].rollup('M')
+
+
+def stage_cube_query(ctx):
+    cube = ctx['cube']
+    cities, products = cube.cities()[::2], cube.products()[::2]
+    cube.by_product(cities, products)
+    for freq in ('D', 'W', 'M'):
+        cube.trend(cities, products, freq)
+
+
+def _history_batch(ctx):
+    batch = ctx['df'].head(HISTORY_BATCH).copy()
+    batch['Status'] = "Completed"
+    batch['Completed At'] = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return batch
+
+
+def stage_history_append(ctx):
+    store = HistoryStore(os.path.join(ctx['tmp'], f"history-{time.time_ns()}"))
+    for _ in range(10):
+        store.append(_history_batch(ctx))
+
+
+def stage_history_rewrite_csv(ctx):
+    # The old approach: concat onto the full history and rewrite the whole file
+    path = os.path.join(ctx['tmp'], "stock_history.csv")
+    history = ctx['df'].head(min(len(ctx['df']), 100_000))
+    for _ in range(10):
+        history = pd.concat([history, _history_batch(ctx)], ignore_index=True)
+        history.to_csv(path, index=False)
+
+
+STAGES = [
+    ("csv_load", stage_csv_load),
+    ("csv_ingest", stage_csv_ingest),
+    ("compact_schema", stage_compact_schema),
+    ("date_features", stage_date_features),
+    ("encode", stage_encode),
+    ("demand_features", stage_demand_features),
+    ("predict", stage_predict),
+    ("pending_filter_scan", stage_pending_filter_scan),
+    ("search_index_build", stage_search_index_build),
+    ("search_index_query", stage_search_index_query),
+    ("low_stock", stage_low_stock),
+    ("alerts_build", stage_alerts_build),
+    ("alerts_edit_x100", stage_alerts_edit),
+    ("analysis_groupby", stage_analysis_groupby),
+    ("cube_build", stage_cube_build),
+    ("cube_query", stage_cube_query),
+    ("history_append_x10", stage_history_append),
+    ("history_rewrite_csv_x10", stage_history_rewrite_csv),
+]
+
+
+def run_stages(path, measure_memory, repeat=1):
+    ctx = {'path': path, 'bundle': load_bundle(), 'tmp': tempfile.mkdtemp(prefix="bench-")}
+    results = {}
+    try:
+        for name, stage in STAGES:
+            if measure_memory:
+                tracemalloc.start()
+            runs = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                stage(ctx)
+                runs.append(time.perf_counter() - start)
+            result = {"seconds": round(min(runs), 6)}
+            if measure_memory:
+                result["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 3)
+                tracemalloc.stop()
+            results[name] = result
+    finally:
+        shutil.rmtree(ctx['tmp'], ignore_errors=True)
+    return results, len(ctx['df'])
+
+
+# Time stages in clean passes (best of `repeat` runs each, which is what
+# --check compares), then optionally trace memory in one more pass, since
+# tracemalloc itself slows allocation-heavy stages down.
+def run_suite(path, measure_memory=True, repeat=5):
+    timings, rows = run_stages(path, measure_memory=False, repeat=repeat)
+    if measure_memory:
+        memory, _ = run_stages(path, measure_memory=True)
+        for name in timings:
+            timings[name]["peak_mb"] = memory[name]["peak_mb"]
+    return {
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "data": os.path.abspath(path),
+        "rows": rows,
+        "repeat": repeat,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+        },
+        "stages": timings,
+    }
+
+
+# (stage, metric, baseline, result) for stages slower than baseline x tolerance
+# (and by more than `min_delta` seconds), or with a traced peak above baseline x
+# memory_tolerance (and by more than `min_mb`) when both runs measured memory
+def regressions(result, baseline, tolerance=1.25, min_delta=0.005, memory_tolerance=1.25, min_mb=1.0):
+    found = []
+    for name, stage in result["stages"].items():
+        base = baseline["stages"].get(name)
+        if not base:
+            continue
+        if stage["seconds"] > base["seconds"] * tolerance and stage["seconds"] - base["seconds"] > min_delta:
+            found.append((name, "seconds", base["seconds"], stage["seconds"]))
+        if "peak_mb" in stage and "peak_mb" in base:
+            if stage["peak_mb"] > base["peak_mb"] * memory_tolerance and stage["peak_mb"] - base["peak_mb"] > min_mb:
+                found.append((name, "peak_mb", base["peak_mb"], stage["peak_mb"]))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the stock dashboard pipeline.")
+    parser.add_argument("--rows", type=int, default=10_000, help="synthetic rows to generate (ignored with --data)")
+    parser.add_argument("--cities", type=int, default=12)
+    parser.add_argument("--products", type=int, default=30)
+    parser.add_argument("--data", default=None, help="benchmark an existing CSV instead of synthetic data")
+    parser.add_argument("--label", default=None, help="baseline name (default: <rows>rows)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--check", default=None, help="baseline JSON to compare against; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=1.25)
+    parser.add_argument("--memory-tolerance", type=float, default=1.25)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per stage (the best is recorded)")
+    args = parser.parse_args()
+
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    path = args.data
+    if path is None:
+        path = os.path.join(BENCH_DIR, "data", f"synthetic_{args.rows}_{args.cities}x{args.products}.csv")
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            print(f"Generating {args.rows:,} synthetic rows -> {path}")
+            generate(path, args.rows, args.cities, args.products)
+
+    result = run_suite(path, measure_memory=not args.no_memory, repeat=args.repeat)
+    print(f"{result['rows']:,} rows from {path}")
+    for name, stage in result["stages"].items():
+        peak = f"{stage['peak_mb']:>10.1f} MB" if "peak_mb" in stage else ""
+        print(f"  {name:<26}{stage['seconds'] * 1000:>12.1f} ms{peak}")
+
+    label = args.label or (f"{args.rows}rows" if args.data is None else os.path.splitext(os.path.basename(path))[0])
+    out = os.path.join(BENCH_DIR, f"{label}.json")
+    if args.check:
+        with open(args.check, encoding="utf-8") as f:
+            slow = regressions(result, json.load(f), args.tolerance, memory_tolerance=args.memory_tolerance)
+        out = os.path.join(BENCH_DIR, f"{label}.latest.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {out}")
+
+    if args.check:
+        for name, metric, before, after in slow:
+            if metric == "seconds":
+                print(f"  REGRESSION {name}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms")
+            else:
+                print(f"  REGRESSION {name}: peak {before:.1f} MB -> {after:.1f} MB")
+        if slow:
+            sys.exit(1)
+        print(f"No regressions against {args.check}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# 🏷️ Hash-map categorical encoder with an unseen-value bucket
+#
+# sklearn's LabelEncoder.transform binary-searches every value against its sorted
+# classes and raises on the first city or product it has not seen, which used to
+# abort the whole upload. CategoryEncoder holds the same classes in a pandas hash
+# index and encodes a column in one vectorized lookup. For categorical columns
+# (see compact_schema) only the distinct categories are looked up and the row
+# codes are remapped through that small table.
+#
+# Known values get exactly the LabelEncoder's codes. Unknown values map to the
+# reserved code len(classes_) and are counted, both per call (`encode`) and in a
+# running total for the process (`unknown_counts`).
+#
+# model_registry swaps every LabelEncoder it loads (bare or inside a bundle) for
+# a CategoryEncoder, so all scoring paths pick this up.
+
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# Encoded column -> (source column, bundle key)
+ENCODED_COLUMNS = {
+    'City_encoded': ('City', 'city_encoder'),
+    'Product_encoded': ('Product line', 'product_encoder'),
+}
+
+
+class CategoryEncoder:
+    def __init__(self, classes):
+        self.classes_ = np.asarray(classes, dtype=object)
+        self.index = pd.Index(self.classes_)
+        self.unknown_code = len(self.classes_)
+        self.unknown_counts = Counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_label_encoder(cls, encoder):
+        return cls(encoder.classes_)
+
+    # (codes, counts of unseen values) for a column / array of values
+    def encode(self, values):
+        values = values if isinstance(values, pd.Series) else pd.Series(values)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            table = np.append(self.index.get_indexer(values.cat.categories.astype(str)), -1)
+            codes = table[values.cat.codes.to_numpy()]  # NaN rows have code -1 -> last slot
+        else:
+            codes = self.index.get_indexer(values.astype(str))
+        codes = codes.astype(np.int64)
+        unknown = codes < 0
+        if not unknown.any():
+            return codes, pd.Series(dtype=np.int64)
+        codes[unknown] = self.unknown_code
+        return codes, values[unknown].astype(str).value_counts(dropna=False)
+
+    # LabelEncoder-compatible: codes only, unseen values are counted, not raised
+    def transform(self, values):
+        codes, unseen = self.encode(values)
+        if len(unseen):
+            with self._lock:
+                self.unknown_counts.update(unseen.to_dict())
+        return codes
+
+    def inverse_transform(self, codes):
+        codes = np.asarray(codes)
+        out = np.full(len(codes), None, dtype=object)
+        known = (codes >= 0) & (codes < self.unknown_code)
+        out[known] = self.classes_[codes[known]]
+        return out
+
+
+# Replace LabelEncoders in a loaded artifact (bare, or values of a bundle dict)
+def fast_encoders(obj):
+    if type(obj).__name__ == "LabelEncoder" and hasattr(obj, "classes_"):
+        return CategoryEncoder.from_label_encoder(obj)
+    if isinstance(obj, dict):
+        return {key: fast_encoders(value) for key, value in obj.items()}
+    return obj
+
+
+# {source column: counts of values scored with the unknown bucket} for a scored frame
+def unseen_values(df, bundle):
+    report = {}
+    for encoded, (column, key) in ENCODED_COLUMNS.items():
+        encoder = bundle[key]
+        if encoded in df.columns and isinstance(encoder, CategoryEncoder):
+            mask = df[encoded].to_numpy() == encoder.unknown_code
+            if mask.any():
+                report[column] = df.loc[mask, column].astype(str).value_counts(dropna=False)
+    return report
@@ -0,0 +1,110 @@
+# 📉 Chart data layer for the Analysis page: downsampled, cached plotly figures
+#
+# The trend expanders used to build fresh plotly figures from the full groupby
+# output on every rerun (Streamlit runs an expander's body even when it is
+# collapsed), so years of daily data meant thousands of points re-serialized and
+# shipped to the browser each time.
+#
+# Series longer than TARGET_POINTS are reduced with Largest-Triangle-Three-Buckets
+# (LTTB): the first and last points are kept, and each bucket in between keeps
+# the point that forms the largest triangle with the previously kept point and
+# the next bucket's average, so peaks and troughs survive. Built figures are kept
+# as JSON in a per-process LRU (CHART_CACHE_BYTES) keyed by (data version, chart,
+# filters, granularity, target), so a rerun on unchanged data only parses the
+# cached JSON.
+
+import json
+import os
+import sys
+
+import numpy as np
+
+from prediction_cache import LRUCache
+from tracing import span
+
+TARGET_POINTS = int(os.environ.get("CHART_TARGET_POINTS", 1000))
+CACHE_BYTES = int(os.environ.get("CHART_CACHE_BYTES", 64 * 1024 * 1024))
+
+TRENDS = {
+    'D': ('Date', 'line', "📅 Daily Needed Stock Trend"),
+    'W': ('Week', 'bar', "🗓️ Weekly Needed Stock Trend"),
+    'M': ('Month_Year', 'line', "📆 Monthly Needed Stock Trend"),
+}
+
+
+# Positions of the points LTTB keeps to draw (x, y) with `threshold` points
+def lttb(x, y, threshold):
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)  # threshold - 2 buckets over [1, n - 1)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt = slice(edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else slice(n - 1, n)
+        avg_x, avg_y = x[nxt].mean(), y[nxt].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+def downsample(frame, x_col, y_col, threshold=TARGET_POINTS):
+    if len(frame) <= threshold:
+        return frame
+    x = frame[x_col]
+    x = x.to_numpy().astype('datetime64[ns]').astype(np.int64) if x.dtype.kind == 'M' else np.arange(len(frame))
+    return frame.iloc[lttb(x, frame[y_col].to_numpy(), threshold)]
+
+
+# Keyed by (data version, chart, filters, ...), sized by the figure JSON; one
+# cache per server process, shared by all sessions
+figure_cache = LRUCache(CACHE_BYTES, sizeof=lambda entry: sys.getsizeof(entry[0]))
+
+
+def _filters(cities, products):
+    return tuple(sorted(map(str, cities))), tuple(sorted(map(str, products)))
+
+
+# (figure dict, points in the series, points drawn) for a cube trend, or None if empty
+def trend_figure(cube, cities, products, freq, target=TARGET_POINTS):
+    x_col, kind, title = TRENDS[freq]
+
+    def build():
+        import plotly.express as px
+
+        with span("analysis_groupby"):
+            trend = cube.trend(cities, products, freq)
+        if trend.empty:
+            return None, {'points': 0, 'shown': 0}
+        shown = downsample(trend, x_col, 'Needed Stock', target)
+        with span("plotly_render"):
+            draw = px.bar if kind == 'bar' else px.line
+            fig = draw(shown, x=x_col, y='Needed Stock', title=title)
+        return fig.to_json(), {'points': len(trend), 'shown': len(shown)}
+
+    key = (cube.data_version, 'trend', freq, _filters(cities, products), target)
+    fig_json, info = figure_cache.get_or_compute(key, build)
+    return (json.loads(fig_json) if fig_json else None), info['points'], info['shown']
+
+
+# Product demand share pie (figure dict, or None if empty) for the selected cities & products
+def demand_share_figure(cube, cities, products):
+    def build():
+        import plotly.express as px
+
+        with span("analysis_groupby"):
+            pie_df = cube.by_product(cities, products)[['Product line', 'Needed Stock']]
+        if pie_df.empty:
+            return None, {}
+        with span("plotly_render"):
+            fig = px.pie(pie_df, names='Product line', values='Needed Stock', hole=0.4)
+        return fig.to_json(), {}
+
+    key = (cube.data_version, 'demand_share', _filters(cities, products))
+    fig_json, _ = figure_cache.get_or_compute(key, build)
+    return json.loads(fig_json) if fig_json else None
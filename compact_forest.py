@@ -0,0 +1,188 @@
+# 🌲 Compact, array-backed inference backend for the RandomForest stock model
+#
+# The pickled forest is 100 separate sklearn Tree objects. Here every tree's
+# nodes are flattened into a handful of shared numpy arrays (feature, threshold,
+# left, right, value) and saved as an uncompressed .npz. Loading memory-maps the
+# arrays, so it is close to instant, and prediction walks all trees for a block
+# of rows at once: one vectorized step per tree level, with (tree, row) pairs
+# dropping out as soon as they land on a leaf (leaves point to themselves).
+# Inputs are cast to float32 before comparing, exactly like sklearn's trees, so
+# predictions match the original to float rounding.
+#
+# Best fit: fast process start-up and small interactive batches (single records,
+# a page of rows), where sklearn's per-call overhead dominates. For very large
+# batches sklearn's compiled traversal is still faster; `compare` shows both.
+#
+# Usage:
+#   python compact_forest.py compile                     # clean_model.pkl -> clean_model.npz
+#   python compact_forest.py compare                     # latency / size / accuracy table
+#
+# The dashboard uses it when started with MODEL_BACKEND=compact.
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+BLOCK_ROWS = 16_384
+TOLERANCE = 1e-6
+
+
+class CompactForest:
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features_in_ = int(n_features)
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            ids = np.arange(n, dtype=np.int32)
+            is_leaf = tree.children_left < 0
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, ids, tree.children_left).astype(np.int32) + offset)
+            rights.append(np.where(is_leaf, ids, tree.children_right).astype(np.int32) + offset)
+            values.append(tree.value[:, 0, 0].astype(np.float64))
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n
+
+        return cls(
+            np.concatenate(features), np.concatenate(thresholds),
+            np.concatenate(lefts), np.concatenate(rights), np.concatenate(values),
+            np.asarray(roots, dtype=np.int32), max_depth, forest.n_features_in_,
+        )
+
+    def save(self, path):
+        tmp = path + ".tmp.npz"
+        np.savez(
+            tmp, feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+            value=self.value, roots=self.roots, meta=np.array([self.max_depth, self.n_features_in_]),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        arrays = np.load(path, mmap_mode=mmap_mode)
+        max_depth, n_features = arrays["meta"]
+        return cls(arrays["feature"], arrays["threshold"], arrays["left"], arrays["right"],
+                   arrays["value"], arrays["roots"], max_depth, n_features)
+
+    def _predict_block(self, X):
+        n_rows, n_features = X.shape
+        n_trees = len(self.roots)
+        flat = X.ravel()
+        node = np.repeat(self.roots, n_rows)                   # tree-major (tree, row) pairs
+        offset = np.tile(np.arange(n_rows) * n_features, n_trees)  # row start in `flat`
+        active = np.arange(node.size)
+        # Only pairs that haven't reached a leaf yet take another step
+        while active.size:
+            n = node[active]
+            go_left = flat[offset[active] + self.feature[n]] <= self.threshold[n]
+            n = np.where(go_left, self.left[n], self.right[n])
+            node[active] = n
+            active = active[self.left[n] != n]
+        return self.value[node].reshape(n_trees, n_rows).mean(axis=0)
+
+    def predict(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        out = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], BLOCK_ROWS):
+            out[start:start + BLOCK_ROWS] = self._predict_block(X[start:start + BLOCK_ROWS])
+        return out
+
+
+def compact_path(model_path):
+    if model_path.endswith("bundle.joblib"):
+        return os.path.join(os.path.dirname(model_path), "model.npz")
+    return os.path.splitext(model_path)[0] + ".npz"
+
+
+# Compile a pickled forest (or a train.py bundle) to the compact .npz format
+def compile_model(model_path, out_path=None):
+    import joblib
+    forest = joblib.load(model_path)
+    if isinstance(forest, dict):
+        forest = forest["model"]
+    out_path = out_path or compact_path(model_path)
+    CompactForest.from_sklearn(forest).save(out_path)
+    return out_path
+
+
+def _best_of(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+# Side-by-side size, load time, per-batch latency and max prediction difference
+def compare(model_path, compact_model_path, X, batch_sizes=(1, 10, 100, 1000, 10_000)):
+    import joblib
+
+    pkl_load, forest = _best_of(lambda: joblib.load(model_path), 1)
+    if isinstance(forest, dict):
+        forest = forest["model"]
+    npz_load, compact = _best_of(lambda: CompactForest.load(compact_model_path), 1)
+
+    rows = []
+    for name, model, path, load in (("RandomForest (.pkl)", forest, model_path, pkl_load),
+                                    ("CompactForest (.npz)", compact, compact_model_path, npz_load)):
+        row = {"Backend": name, "Size (MB)": os.path.getsize(path) / 1e6, "Load (ms)": load * 1000}
+        for n in batch_sizes:
+            if n <= len(X):
+                seconds, _ = _best_of(lambda: model.predict(X[:n]), 5 if n <= 1000 else 2)
+                row[f"{n:,} rows (ms)"] = seconds * 1000
+        rows.append(row)
+
+    max_diff = float(np.max(np.abs(forest.predict(X) - compact.predict(X)))) if len(X) else 0.0
+    return rows, max_diff
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the forest into compact arrays and compare backends.")
+    parser.add_argument("command", choices=["compile", "compare"])
+    parser.add_argument("--model", default="clean_model.pkl")
+    parser.add_argument("--out", default=None, help="compact model path (default: <model>.npz)")
+    parser.add_argument("--data", default="Cleaned_Walmart_Stock_Analysis.csv")
+    parser.add_argument("--rows", type=int, default=10_000, help="rows used for the accuracy check")
+    args = parser.parse_args()
+
+    out = args.out or compact_path(args.model)
+    if args.command == "compile":
+        print(f"Wrote {compile_model(args.model, out)}")
+        return
+
+    import pandas as pd
+    from model_registry import CITY_ENCODER_FILE, PRODUCT_ENCODER_FILE, get_artifact
+    from scoring import FEATURES, add_features
+
+    if not os.path.exists(out):
+        compile_model(args.model, out)
+    df = add_features(pd.read_csv(args.data), get_artifact(CITY_ENCODER_FILE), get_artifact(PRODUCT_ENCODER_FILE))
+    X = df[FEATURES].to_numpy()
+    X = np.resize(X, (args.rows, X.shape[1]))
+
+    table, max_diff = compare(args.model, out, X)
+    print(pd.DataFrame(table).round(3).to_string(index=False))
+    status = "OK" if max_diff <= TOLERANCE else "MISMATCH"
+    print(f"{len(X):,} rows scored; max |diff| = {max_diff:.3g} (tolerance {TOLERANCE:g}) -> {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# 🗜️ Compact columnar schema + Parquet storage for the Walmart dataset
+#
+# CSV loads give every column object/int64/float64. City and Product line are a
+# handful of repeated strings and the calendar fields fit in a byte or two, so the
+# working set is converted to categoricals, narrow ints and float32 at load time.
+# float32 is lossless for prediction: sklearn's trees cast their input to float32.
+#
+# Parquet (via pyarrow) is the on-disk format; CSV stays the import/export format.
+# `load_table("x.csv")` transparently reads/refreshes a sibling "x.parquet".
+#
+# Usage:
+#   python compact_schema.py Cleaned_Walmart_Stock_Analysis.csv     # CSV -> Parquet
+#   python compact_schema.py data.parquet --to-csv out.csv          # Parquet -> CSV
+
+import argparse
+import io
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+CATEGORY_COLUMNS = ['City', 'Product line']
+INT_COLUMNS = {
+    'Year': 'int16',
+    'Month': 'int8',
+    'Day': 'int8',
+    'Weekday': 'int8',
+    'Quantity': 'int32',
+    'Current Stock': 'int32',
+    'City_encoded': 'int16',
+    'Product_encoded': 'int16',
+}
+FLOAT_COLUMNS = ['Unit price', 'Predicted Quantity', 'Needed Stock', 'Gap to Fulfill']
+
+
+# Narrow dtypes in place of the CSV defaults; columns that aren't present are skipped
+def compact(df):
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    for col, dtype in INT_COLUMNS.items():
+        if col in df.columns:
+            # Sparse columns (e.g. older history rows) keep NaN, so fall back to float32
+            df[col] = df[col].astype(dtype if df[col].notna().all() else 'float32')
+    for col in FLOAT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('float32')
+    return df
+
+
+def memory_mb(df):
+    return df.memory_usage(index=True, deep=True).sum() / (1024 * 1024)
+
+
+def parquet_path(path):
+    return os.path.splitext(path)[0] + ".parquet"
+
+
+def read_any(source, name=None):
+    name = name or getattr(source, "name", source)
+    if str(name).endswith(".parquet"):
+        return compact(pd.read_parquet(source))
+    return compact(pd.read_csv(source))
+
+
+def read_bytes(data, name):
+    return read_any(io.BytesIO(data), name)
+
+
+def save_table(df, path):
+    if path.endswith(".parquet"):
+        tmp = path + ".tmp"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+    else:
+        df.to_csv(path, index=False)
+
+
+# Load a CSV-backed table, preferring an up-to-date Parquet copy next to it
+def load_table(csv_path):
+    pq = parquet_path(csv_path)
+    if HAS_PARQUET and os.path.exists(pq):
+        if not os.path.exists(csv_path) or os.path.getmtime(pq) >= os.path.getmtime(csv_path):
+            return compact(pd.read_parquet(pq))
+    df = compact(pd.read_csv(csv_path))
+    if HAS_PARQUET:
+        save_table(df, pq)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert Walmart tables between CSV and compact Parquet.")
+    parser.add_argument("input", help="CSV to convert to Parquet, or Parquet to export")
+    parser.add_argument("--to-csv", default=None, help="export the input table as CSV to this path")
+    args = parser.parse_args()
+
+    raw_mb = memory_mb(pd.read_csv(args.input)) if args.input.endswith(".csv") else None
+    df = read_any(args.input)
+    if args.to_csv:
+        save_table(df, args.to_csv)
+        print(f"Wrote {len(df):,} rows to {args.to_csv}")
+        return
+
+    if not HAS_PARQUET:
+        raise SystemExit("pyarrow is required for Parquet output (pip install pyarrow)")
+    out = parquet_path(args.input)
+    save_table(df, out)
+    print(f"Wrote {len(df):,} rows to {out} ({memory_mb(df):.2f} MB in memory)")
+    if raw_mb is not None:
+        print(f"Same table with CSV dtypes: {raw_mb:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
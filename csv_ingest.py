@@ -0,0 +1,291 @@
+# 🧾 Schema-validating CSV ingest for Walmart uploads
+#
+# Uploads used to go through a single-threaded pd.read_csv, and the first bad
+# date then raised out of pd.to_datetime halfway through scoring. A missing
+# column showed up as a KeyError somewhere further down.
+#
+# The CSV is now read with pyarrow's multithreaded reader and an explicit schema
+# (COLUMN_TYPES). City and Product line come out as dictionaries, i.e.
+# categoricals. Dates are read the same way, and each distinct date is parsed
+# once, strictly, as dd-mm-yyyy with an ISO fallback. pyarrow's own timestamp
+# parser is not used because it rolls 31-02-2019 over into March.
+#   - Missing required columns raise IngestError before anything is parsed.
+#   - A clean file needs only O(1) null counts and the per-distinct date check.
+#   - If a date is bad or a required cell is empty, the rows are validated in
+#     vectorized passes.
+#   - If some cell doesn't convert to its type at all, the schema columns are
+#     first re-read as text.
+#   - Bad rows are dropped and listed in a rejection report instead of failing
+#     the upload.
+#   - Rows with the wrong number of fields are skipped and reported too.
+#
+# The report has one row per rejected row. Its columns are Row (1-based among
+# the well-formed data rows, header excluded), Problems, and the row's values
+# of the schema columns the file has.
+#
+# Without pyarrow the same validation runs on a pandas read. In that case
+# malformed rows are skipped without being reported.
+#
+# Usage:
+#   python csv_ingest.py upload.csv --report rejected.csv
+#   python csv_ingest.py upload.csv --compare          # vs pd.read_csv + pd.to_datetime
+
+import argparse
+import csv
+import io
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from compact_schema import CATEGORY_COLUMNS, HAS_PARQUET, compact, read_bytes
+from scoring import DATE_FORMAT
+
+# column -> type: 'date', 'string', 'int' or 'float'
+COLUMN_TYPES = {
+    'Date': 'date',
+    'City': 'string',
+    'Product line': 'string',
+    'Unit price': 'float',
+    'Quantity': 'int',
+    'Year': 'int',
+    'Month': 'int',
+    'Day': 'int',
+    'Weekday': 'int',
+    'Predicted Quantity': 'float',
+    'Current Stock': 'int',
+    'Gap to Fulfill': 'float',
+    'Status': 'string',
+}
+REQUIRED_COLUMNS = ['Date', 'City', 'Product line', 'Unit price', 'Quantity']
+# Empty cells are fine here: these are recomputed from other columns or defaulted
+NULLABLE_COLUMNS = {'Year', 'Month', 'Day', 'Weekday', 'Predicted Quantity', 'Gap to Fulfill', 'Status'}
+REPORT_COLUMNS = ['Row', 'Problems']  # followed by the file's schema columns
+
+
+class IngestError(ValueError):
+    pass
+
+
+def empty_report(columns=COLUMN_TYPES):
+    return pd.DataFrame(columns=REPORT_COLUMNS + [col for col in COLUMN_TYPES if col in columns])
+
+
+def _header(data):
+    first = data[:data.find(b"\n")] if b"\n" in data else data
+    return next(csv.reader([first.decode("utf-8-sig").rstrip("\r")]), [])
+
+
+def _check_columns(columns):
+    missing = [col for col in REQUIRED_COLUMNS if col not in columns]
+    if missing:
+        raise IngestError(f"missing required columns: {', '.join(missing)}")
+
+
+# Report rows for lines a reader skipped because they had the wrong field count
+def malformed_report(messages, columns):
+    report = pd.DataFrame({'Problems': [f"malformed row: {m}" for m in messages]}).reindex(columns=columns)
+    return report.astype({'Row': 'Int64'})
+
+
+# pd.read_csv arguments that read the schema columns as text (categoricals, with
+# only empty cells as NaN), ready for validate()
+def text_read_options(columns=COLUMN_TYPES):
+    return {'dtype': {col: 'category' for col in columns}, 'keep_default_na': False,
+            'na_values': {col: [''] for col in columns}}
+
+
+def _check_rows(df, report):
+    if df.empty:
+        example = f" (e.g. {report['Problems'].iloc[0]})" if len(report) else ""
+        raise IngestError(f"no valid rows: {len(report):,} rejected{example}")
+
+
+# ---------- vectorized validation of text columns ----------
+PROBLEMS = {'date': "not a dd-mm-yyyy date", 'int': "not a whole number", 'float': "not a number"}
+
+
+# Typed values of distinct, stripped cell texts (NaN / NaT where they don't parse)
+def _convert(uniques, kind):
+    if kind == 'date':
+        parsed = pd.to_datetime(uniques, format=DATE_FORMAT, errors='coerce')
+        if parsed.isna().any():
+            parsed = parsed.fillna(pd.to_datetime(uniques, format='ISO8601', errors='coerce'))
+        return parsed.astype('datetime64[ns]')
+    value = pd.to_numeric(uniques, errors='coerce')
+    return value.where(value == value.round()) if kind == 'int' else value
+
+
+# (typed values, problem or None per row) of one text / categorical column. A
+# file has few distinct dates, prices or quantities, so each distinct text is
+# checked once and the result gathered back by factorize codes.
+def _check_column(text, col):
+    kind = COLUMN_TYPES[col]
+    if kind in ('int', 'float') and pd.api.types.is_numeric_dtype(text):
+        # Already converted by the reader: only empty cells can be a problem
+        missing = None if col in NULLABLE_COLUMNS else f"{col}: missing"
+        return text, np.where(text.isna().to_numpy(), missing, None)
+    codes, uniques = pd.factorize(text)
+    uniques = pd.Series(np.asarray(uniques, dtype=object), dtype=object).str.strip()
+    blank = (uniques == '').to_numpy()
+    problem = np.full(len(uniques) + 1, None, dtype=object)  # last slot: empty cells (code -1)
+    if col not in NULLABLE_COLUMNS:
+        problem[np.append(blank, True)] = f"{col}: missing"
+    if kind == 'string':
+        return (text if col in CATEGORY_COLUMNS else text.astype(object)), problem[codes]
+    typed = _convert(uniques.where(~blank), kind)
+    problem[:-1][~blank & typed.isna().to_numpy()] = f"{col}: {PROBLEMS[kind]}"
+    value = typed.reindex(range(len(uniques) + 1)).to_numpy()[codes]
+    return pd.Series(value, index=text.index), problem[codes]
+
+
+# (accepted rows with typed schema columns, rejection report) for a frame whose
+# schema columns hold text, with empty cells as NaN
+def validate(raw):
+    _check_columns(raw.columns)
+    columns = [col for col in COLUMN_TYPES if col in raw.columns]
+    df = raw.copy()
+    problems = {}
+    for col in columns:
+        df[col], problems[col] = _check_column(raw[col], col)
+
+    problems = pd.DataFrame(problems, index=raw.index)
+    rejected = problems.notna().any(axis=1)
+    df = df[~rejected].reset_index(drop=True)
+    for col in columns:
+        if COLUMN_TYPES[col] == 'int' and df[col].notna().all():
+            df[col] = df[col].astype('int64')
+
+    if not rejected.any():
+        return df, empty_report(columns)
+    report = raw.loc[rejected, columns].astype(object).reindex(columns=REPORT_COLUMNS + columns)
+    report['Row'] = pd.array(raw.index[rejected] + 1, dtype='Int64')
+    report['Problems'] = problems[rejected].apply(lambda row: "; ".join(row.dropna()), axis=1)
+    return df, report.reset_index(drop=True)
+
+
+# ---------- readers ----------
+def _read_arrow(data, column_types):
+    import pyarrow as pa
+    import pyarrow.csv as pcsv
+
+    malformed = []
+    lock = threading.Lock()
+
+    def skip(row):
+        where = f"line {row.number}" if row.number is not None else "a row"
+        with lock:
+            malformed.append(f"{where} has {row.actual_columns} fields, expected {row.expected_columns}: {row.text.strip()}")
+        return 'skip'
+
+    table = pcsv.read_csv(
+        pa.py_buffer(data),
+        read_options=pcsv.ReadOptions(use_threads=True),
+        parse_options=pcsv.ParseOptions(invalid_row_handler=skip),
+        convert_options=pcsv.ConvertOptions(
+            column_types=column_types,
+            null_values=[''],
+            strings_can_be_null=True,
+        ),
+    )
+    return table, malformed
+
+
+def _ingest_arrow(data, schema):
+    import pyarrow as pa
+
+    text = pa.dictionary(pa.int32(), pa.string())
+    typed = {'date': text, 'string': pa.string(), 'int': pa.int64(), 'float': pa.float64()}
+    column_types = {col: text if col in CATEGORY_COLUMNS else typed[COLUMN_TYPES[col]] for col in schema}
+    try:
+        table, malformed = _read_arrow(data, column_types)
+    except pa.ArrowInvalid:
+        # Some cell does not convert: read the schema columns as text instead
+        table, malformed = _read_arrow(data, {col: text for col in schema})
+        df, report = validate(table.to_pandas())
+    else:
+        df = table.to_pandas()
+        dates, problems = _check_column(df['Date'], 'Date')
+        if pd.notna(problems).any() or any(table.column(col).null_count for col in schema if col not in NULLABLE_COLUMNS):
+            df, report = validate(df)
+        else:
+            df['Date'], report = dates, empty_report(schema)
+
+    if malformed:
+        skipped = malformed_report(malformed, report.columns)
+        report = skipped if report.empty else pd.concat([skipped, report], ignore_index=True)
+        report['Row'] = report['Row'].astype('Int64')
+    return df, report
+
+
+def _ingest_pandas(data, schema):
+    raw = pd.read_csv(io.BytesIO(data), on_bad_lines='skip', **text_read_options(schema))
+    return validate(raw)
+
+
+# (compacted frame of the accepted rows, rejection report) for CSV bytes or a path
+def ingest_csv(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        data = bytes(source)
+    else:
+        with open(source, "rb") as f:
+            data = f.read()
+    header = _header(data)
+    _check_columns(header)
+    schema = [col for col in COLUMN_TYPES if col in header]
+    df, report = (_ingest_arrow if HAS_PARQUET else _ingest_pandas)(data, schema)
+    _check_rows(df, report)
+    return compact(df), report
+
+
+# Uploaded bytes as (frame, rejection report); Parquet is already typed
+def read_upload(data, name):
+    if str(name).endswith(".parquet"):
+        df = read_bytes(data, name)
+        return df, empty_report(df.columns)
+    return ingest_csv(data)
+
+
+# ---------- the previous path, for --compare ----------
+def legacy_read(path):
+    df = pd.read_csv(path)
+    df['Date'] = pd.to_datetime(df['Date'], format=DATE_FORMAT)
+    return compact(df)
+
+
+def _best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate a Walmart CSV against the ingest schema.")
+    parser.add_argument("src", help="CSV file")
+    parser.add_argument("--report", default=None, help="write the rejected rows to this CSV")
+    parser.add_argument("--compare", action="store_true", help="also time pd.read_csv + pd.to_datetime on the same file")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing (best is reported)")
+    args = parser.parse_args()
+
+    seconds, (df, report) = _best_of(lambda: ingest_csv(args.src), args.repeat)
+    print(f"ingest        {seconds:8.3f}s  {len(df):,} rows accepted, {len(report):,} rejected")
+    if args.compare:
+        try:
+            legacy, _ = _best_of(lambda: legacy_read(args.src), args.repeat)
+            print(f"read_csv      {legacy:8.3f}s  ({legacy / seconds:.2f}x the ingest time)")
+        except Exception as exc:  # the old path has no partial result on dirty files
+            print(f"read_csv      failed: {type(exc).__name__}: {str(exc).splitlines()[0]}")
+    if len(report):
+        print(report.head(10).to_string(index=False))
+        if args.report:
+            report.to_csv(args.report, index=False)
+            print(f"Rejected rows written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
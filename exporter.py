@@ -0,0 +1,159 @@
+# 💾 On-demand, cached exports of the working set
+#
+# The sidebar's "Download Updated Data" used to run df.to_csv on every rerun of
+# every page, whether or not anyone downloaded. Now the download button gets a
+# callable, so a frame is only serialized when the button is clicked, and the
+# bytes are kept in a small LRU keyed by (data version, format): a second click
+# on unchanged data is served from memory.
+#
+# Formats:
+#   csv       plain CSV, as the baseline download (the default)
+#   csv.gz    gzip-compressed CSV
+#   parquet   Parquet, one row group per chunk (needs pyarrow)
+#   zip       ZIP with one CSV per City
+#
+# Every format is written EXPORT_CHUNK_ROWS rows at a time into a binary file
+# object, so no single string of the whole frame is ever built. The data version
+# is whatever the caller passes, by default a content fingerprint of the frame
+# computed at click time.
+#
+# Usage:
+#   python exporter.py scored.csv --format zip --out by_city.zip
+
+import argparse
+import gzip
+import hashlib
+import io
+import os
+import re
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from compact_schema import HAS_PARQUET
+from prediction_cache import LRUCache
+
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", 100_000))
+CACHE_BUDGET_BYTES = int(os.environ.get("EXPORT_CACHE_BYTES", 256 * 1024 * 1024))
+COMPRESS_LEVEL = 1  # csv.gz / zip deflate level: level 6 was ~40% slower for ~20% smaller files
+
+# format -> (label, file extension, MIME type)
+FORMATS = {
+    'csv': ("CSV", ".csv", "text/csv"),
+    'csv.gz': ("CSV (gzip)", ".csv.gz", "application/gzip"),
+    'parquet': ("Parquet", ".parquet", "application/vnd.apache.parquet"),
+    'zip': ("ZIP, one CSV per city", ".zip", "application/zip"),
+}
+DEFAULT_FORMAT = 'csv'
+
+
+def available_formats():
+    return [fmt for fmt in FORMATS if fmt != 'parquet' or HAS_PARQUET]
+
+
+# Content fingerprint of a frame (values, index, column names and dtypes)
+def frame_version(df):
+    digest = hashlib.sha256(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode())
+    digest.update(np.ascontiguousarray(pd.util.hash_pandas_object(df, index=True).to_numpy()).tobytes())
+    return digest.hexdigest()
+
+
+# ---------- writers: chunked, into a binary file object ----------
+def _write_csv(df, raw):
+    text = io.TextIOWrapper(raw, encoding="utf-8", newline="", write_through=True)
+    for start in range(0, max(len(df), 1), EXPORT_CHUNK_ROWS):
+        df.iloc[start:start + EXPORT_CHUNK_ROWS].to_csv(text, index=False, header=start == 0)
+    text.detach()  # leave `raw` open for the caller
+
+
+def write_csv(df, out):
+    _write_csv(df, out)
+
+
+def write_csv_gz(df, out):
+    with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=COMPRESS_LEVEL, mtime=0) as gz:
+        _write_csv(df, gz)
+
+
+def write_parquet(df, out):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    with pq.ParquetWriter(out, schema) as writer:
+        for start in range(0, len(df), EXPORT_CHUNK_ROWS):
+            chunk = df.iloc[start:start + EXPORT_CHUNK_ROWS]
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def _member_name(value, taken):
+    name = re.sub(r"[^\w\- ]+", "_", str(value)).strip() or "unknown"
+    stem, n = name, 1
+    while name in taken:
+        n += 1
+        name = f"{stem}_{n}"
+    taken.add(name)
+    return f"{name}.csv"
+
+
+def write_city_zip(df, out):
+    cities = df['City'].astype(object).where(df['City'].notna(), "unknown") if 'City' in df.columns \
+        else pd.Series("all", index=df.index)
+    taken = set()
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=COMPRESS_LEVEL) as zf:
+        for city, positions in sorted(cities.groupby(cities.to_numpy(), sort=False).indices.items(), key=lambda kv: str(kv[0])):
+            with zf.open(_member_name(city, taken), "w", force_zip64=True) as member:
+                _write_csv(df.iloc[positions], member)
+
+
+WRITERS = {'csv': write_csv, 'csv.gz': write_csv_gz, 'parquet': write_parquet, 'zip': write_city_zip}
+
+
+def write_export(df, fmt, out):
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    if fmt == 'parquet' and not HAS_PARQUET:
+        raise RuntimeError("Parquet export needs pyarrow")
+    WRITERS[fmt](df, out)
+
+
+# ---------- byte cache ----------
+# Keyed by (data version, format); one cache per server process, shared by all sessions
+export_cache = LRUCache(CACHE_BUDGET_BYTES, sizeof=len)
+
+
+# Serialized `df` in `fmt`, from the cache when this data version was exported before
+def export_bytes(df, fmt, version=None):
+    key = (version if version is not None else frame_version(df), fmt)
+    data = export_cache.get(key)
+    if data is None:
+        out = io.BytesIO()
+        write_export(df, fmt, out)
+        data = out.getvalue()
+        export_cache.put(key, data)
+    return data
+
+
+def export_filename(basename, fmt):
+    return basename + FORMATS[fmt][1]
+
+
+def main():
+    from compact_schema import read_any
+
+    parser = argparse.ArgumentParser(description="Export a CSV / Parquet file as gzip CSV, Parquet or a per-city ZIP.")
+    parser.add_argument("src", help="CSV or Parquet file")
+    parser.add_argument("--format", choices=list(FORMATS), default='csv.gz')
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    df = read_any(args.src)
+    with open(args.out + ".tmp", "wb") as f:
+        write_export(df, args.format, f)
+    os.replace(args.out + ".tmp", args.out)
+    print(f"{len(df):,} rows written to {args.out} ({os.path.getsize(args.out) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
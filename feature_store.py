@@ -0,0 +1,234 @@
+# 📚 Rolling-window demand features per (City, Product line)
+#
+# The store keeps daily Quantity per (City, Product line) as a dense
+# pairs x days matrix plus its running prefix sums. Every demand feature of a
+# row is then a gather from those two arrays, computed for all rows at once:
+#
+#   Qty_lag_k    demand of the pair k days before the row's date
+#   Qty_sum_w    total demand of the pair over the w days before the row's date
+#   Qty_mean_w   Qty_sum_w / w (days without orders count as zero)
+#
+# Only days strictly before the row's date are used, so training rows never see
+# their own target. New days are folded in with one scatter-add, and the prefix
+# sums are recomputed only from the first touched day onwards.
+#
+# `train.py --demand-features` builds a store from the training data and ships it
+# in the bundle (`bundle['feature_store']`). Scoring a frame with days the store
+# has not seen yet uses an overlay: a small store holding only the last HORIZON
+# days plus the new ones, consulted for rows after the store's last day. The
+# shipped store itself is neither copied nor modified. Usage:
+#
+#   python feature_store.py update new_days.csv                  # fold new days into the LATEST bundle's store
+#   python feature_store.py update new_days.csv --max-days 730   # ... and keep only the last 730 days
+#   python feature_store.py show                                 # pairs / date range of the LATEST bundle's store
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from scoring import DATE_FORMAT
+
+LAGS = (1, 7)
+WINDOWS = (7, 28)
+DEMAND_FEATURES = ([f'Qty_lag_{k}' for k in LAGS]
+                   + [f'Qty_{stat}_{w}' for w in WINDOWS for stat in ('sum', 'mean')])
+HORIZON = max(LAGS + WINDOWS)  # days before a row's date that any feature reads
+
+
+# Day of each date; the history mixes dd-mm-yyyy and ISO dates, unparseable -> NaT
+def _days(dates):
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        parsed = pd.to_datetime(dates, format=DATE_FORMAT, errors='coerce')
+        if parsed.isna().any():
+            parsed = parsed.fillna(pd.to_datetime(dates, format='ISO8601', errors='coerce'))
+        dates = parsed
+    return pd.DatetimeIndex(dates).values.astype('datetime64[D]')
+
+
+def _pair_keys(df):
+    return pd.MultiIndex.from_arrays([df['City'].astype(str), df['Product line'].astype(str)])
+
+
+class FeatureStore:
+    def __init__(self):
+        self.pairs = pd.MultiIndex.from_arrays([[], []], names=['City', 'Product line'])
+        self.origin = None                                 # datetime64[D] of column 0
+        self.daily = np.zeros((0, 0), dtype=np.float32)    # pairs x days
+        self.cum = np.zeros((0, 1), dtype=np.float64)      # cum[:, d] = sum of daily[:, :d]
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls().update(df)
+
+    @property
+    def n_days(self):
+        return self.daily.shape[1]
+
+    @property
+    def last_day(self):
+        return None if self.origin is None else self.origin + np.timedelta64(self.n_days - 1, 'D')
+
+    def copy(self):
+        other = FeatureStore()
+        other.pairs, other.origin = self.pairs, self.origin
+        other.daily, other.cum = np.array(self.daily), np.array(self.cum)
+        return other
+
+    # Resize to n_pairs x [first_day, last_day] (keeping data); True if the layout changed
+    def _grow(self, n_pairs, first_day, last_day):
+        origin = first_day if self.origin is None else min(self.origin, first_day)
+        end = last_day if self.origin is None else max(self.last_day, last_day)
+        n_days = int((end - origin).astype(int)) + 1
+        if n_pairs == len(self.pairs) == self.daily.shape[0] and origin == self.origin and n_days == self.n_days:
+            return False
+        shift = 0 if self.origin is None else int((self.origin - origin).astype(int))
+        daily = np.zeros((n_pairs, n_days), dtype=np.float32)
+        daily[:self.daily.shape[0], shift:shift + self.n_days] = self.daily
+        self.daily, self.origin = daily, origin
+        self.cum = np.zeros((n_pairs, n_days + 1))
+        return True
+
+    # Fold Quantity of `df` (Date, City, Product line, Quantity) into the store.
+    # With new_days_only, rows on days the store already covers are skipped.
+    def update(self, df, new_days_only=False):
+        days = _days(df['Date'])
+        keep = ~np.isnat(days)
+        if new_days_only and self.origin is not None:
+            keep &= days > self.last_day
+        if not keep.any():
+            return self
+
+        keys = _pair_keys(df)[keep]
+        days = days[keep]
+        quantity = df['Quantity'].to_numpy(dtype=np.float64)[keep]
+
+        new_pairs = keys.unique()
+        new_pairs = new_pairs[self.pairs.get_indexer(new_pairs) < 0]
+        if len(new_pairs):
+            self.pairs = self.pairs.append(new_pairs.set_names(self.pairs.names))
+        resized = self._grow(len(self.pairs), days.min(), days.max())
+
+        rows = self.pairs.get_indexer(keys)
+        cols = (days - self.origin).astype(np.int64)
+        np.add.at(self.daily, (rows, cols), quantity)
+
+        start = 0 if resized else int(cols.min())
+        self.cum[:, start + 1:] = self.cum[:, start:start + 1] + np.cumsum(self.daily[:, start:], axis=1, dtype=np.float64)
+        return self
+
+    # New store holding only the last `n_days` days (prefix sums restart at its origin)
+    def tail(self, n_days):
+        other = FeatureStore()
+        other.pairs = self.pairs
+        if self.origin is None:
+            return other
+        n_days = min(n_days, self.n_days)
+        other.origin = self.last_day - np.timedelta64(n_days - 1, 'D')
+        other.daily = np.array(self.daily[:, self.n_days - n_days:])
+        other.cum = np.zeros((len(self.pairs), n_days + 1))
+        other.cum[:, 1:] = np.cumsum(other.daily, axis=1, dtype=np.float64)
+        return other
+
+    # Store with the days of `df` it has not seen yet (self if none). Only the
+    # last HORIZON days are copied, into an overlay that answers for the new days.
+    def extended(self, df):
+        if self.origin is not None and not (_days(df['Date']) > self.last_day).any():
+            return self
+        if self.origin is None:
+            return FeatureStore().update(df)
+        return _Overlay(self, self.tail(HORIZON).update(df, new_days_only=True))
+
+    # DEMAND_FEATURES for every row of `df`, computed from days before each row's date
+    def features(self, df):
+        if self.origin is None:
+            return pd.DataFrame(0.0, index=df.index, columns=DEMAND_FEATURES, dtype=np.float32)
+        days = _days(df['Date'])
+        rows = self.pairs.get_indexer(_pair_keys(df))
+        known = (rows >= 0) & ~np.isnat(days)
+        rows = np.where(known, rows, 0)
+        cols = np.where(known, (days - self.origin).astype(np.int64), 0)
+
+        out = {}
+        for k in LAGS:
+            day = cols - k
+            valid = known & (day >= 0) & (day < self.n_days)
+            out[f'Qty_lag_{k}'] = np.where(valid, self.daily[rows, np.clip(day, 0, self.n_days - 1)], 0.0)
+        upper = np.clip(cols, 0, self.n_days)
+        for w in WINDOWS:
+            lower = np.clip(cols - w, 0, self.n_days)
+            total = np.where(known, self.cum[rows, upper] - self.cum[rows, lower], 0.0)
+            out[f'Qty_sum_{w}'] = total
+            out[f'Qty_mean_{w}'] = total / w
+        return pd.DataFrame(out, index=df.index, columns=DEMAND_FEATURES).astype(np.float32)
+
+    def summary(self):
+        return {
+            'pairs': len(self.pairs),
+            'days': self.n_days,
+            'first_day': None if self.origin is None else str(self.origin),
+            'last_day': None if self.origin is None else str(self.last_day),
+            'total_quantity': float(self.cum[:, -1].sum()) if len(self.pairs) else 0.0,
+        }
+
+
+# A store plus an overlay for the days after its last day; rows up to that day
+# read the store, later rows read the overlay (which has the HORIZON days they need)
+class _Overlay:
+    def __init__(self, base, recent):
+        self.base = base
+        self.recent = recent
+
+    @property
+    def last_day(self):
+        return self.recent.last_day
+
+    def extended(self, df):
+        if not (_days(df['Date']) > self.last_day).any():
+            return self
+        return _Overlay(self.base, self.recent.copy().update(df, new_days_only=True))
+
+    def features(self, df):
+        out = self.base.features(df)
+        recent = _days(df['Date']) > self.base.last_day
+        if recent.any():
+            out.loc[recent] = self.recent.features(df[recent]).to_numpy()
+        return out
+
+
+def main():
+    import joblib
+
+    from compact_schema import read_any
+    from model_registry import latest_bundle_path
+
+    parser = argparse.ArgumentParser(description="Inspect or update the demand feature store of the LATEST bundle.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    update = sub.add_parser("update", help="fold days newer than the store's last day into it")
+    update.add_argument("data", help="CSV / Parquet with Date, City, Product line, Quantity")
+    update.add_argument("--max-days", type=int, default=None,
+                        help=f"keep only this many most recent days (at least {HORIZON}; rows before them score with zero history)")
+    sub.add_parser("show")
+    args = parser.parse_args()
+
+    path = latest_bundle_path()
+    bundle = joblib.load(path) if path else None
+    if not bundle or bundle.get('feature_store') is None:
+        parser.error("the LATEST bundle has no feature store; train with `python train.py --demand-features`")
+    store = bundle['feature_store']
+
+    if args.command == "update":
+        before = store.last_day
+        store.update(read_any(args.data), new_days_only=True)
+        if args.max_days is not None:
+            store = bundle['feature_store'] = store.tail(max(args.max_days, HORIZON))
+        bundle['metadata']['feature_store'] = store.summary()
+        joblib.dump(bundle, path + ".tmp")
+        os.replace(path + ".tmp", path)
+        print(f"Store extended from {before} to {store.last_day}")
+    print(store.summary())
+
+
+if __name__ == "__main__":
+    main()
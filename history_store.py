@@ -0,0 +1,321 @@
+# 🗃️ Append-only, month-partitioned history store
+#
+# Completed orders used to be concatenated onto the whole history DataFrame and
+# the entire stock_history.csv rewritten on every completion. Instead, each batch
+# of completed rows is split by the month of `Completed At` and written as one
+# small segment per month under that month's partition directory (sorted by
+# `Completed At`), and one line per segment is appended to manifest.jsonl:
+#
+#   {"file": "2025-07/seg-....parquet", "partition": "2025-07", "rows": 3,
+#    "min": "2025-07-01 13:56:14", "max": "...", "schema": 1}
+#
+# The manifest is the index on `Completed At`: appends are O(1) (new files plus
+# manifest lines), the date bounds come straight from the manifest, and a date
+# range query only opens the segments whose [min, max] overlaps the range, then
+# binary-searches inside each sorted segment.
+#
+# Rows are normalized to one schema before they are written (HISTORY_COLUMNS
+# first, Date parsed from either dd-mm-yyyy or ISO, Needed Stock / Gap to Fulfill
+# filled in, the model-specific *_encoded columns dropped). `compact_history`
+# merges each month's segments into one, rewrites segments from before the
+# schema was normalized, and drops rows older than the retention window:
+#
+#   python history_store.py compact --retention-days 365
+#   python history_store.py show
+#
+# Segments are Parquet when pyarrow is installed (CSV otherwise); both kinds can
+# live side by side in one store and are read back with the compact schema.
+
+import argparse
+import json
+import os
+import time
+
+import pandas as pd
+
+from compact_schema import HAS_PARQUET, compact
+from file_lock import locked
+from scoring import DATE_FORMAT
+
+HISTORY_DIR = "stock_history"
+LEGACY_CSV = "stock_history.csv"
+MANIFEST = "manifest.jsonl"
+TIME_COLUMN = "Completed At"
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+PARTITION_FORMAT = "%Y-%m"
+SCHEMA_VERSION = 1
+RETENTION_DAYS = int(os.environ["HISTORY_RETENTION_DAYS"]) if os.environ.get("HISTORY_RETENTION_DAYS") else None
+
+HISTORY_COLUMNS = [
+    'Date', 'Year', 'Month', 'Day', 'Weekday', 'City', 'Product line', 'Unit price', 'Quantity',
+    'Predicted Quantity', 'Needed Stock', 'Current Stock', 'Gap to Fulfill', 'Status', TIME_COLUMN,
+]
+DROPPED_COLUMNS = ['City_encoded', 'Product_encoded']  # encoder-version specific, rebuilt from City / Product line
+
+
+# One schema for every segment, whatever the app version that completed the rows
+def normalize_history(df):
+    df = df.drop(columns=[c for c in DROPPED_COLUMNS if c in df.columns])
+    df[TIME_COLUMN] = pd.to_datetime(df[TIME_COLUMN], format="mixed")
+    if 'Date' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['Date']):
+        dates = pd.to_datetime(df['Date'], format=DATE_FORMAT, errors='coerce')
+        df['Date'] = dates.fillna(pd.to_datetime(df['Date'], format='ISO8601', errors='coerce'))
+    if 'Predicted Quantity' in df.columns:
+        needed = df['Needed Stock'] if 'Needed Stock' in df.columns else pd.Series(float('nan'), index=df.index)
+        df['Needed Stock'] = needed.fillna(df['Predicted Quantity'])
+    if 'Needed Stock' in df.columns and 'Current Stock' in df.columns:
+        df['Gap to Fulfill'] = df['Needed Stock'] - df['Current Stock']
+    ordered = [c for c in HISTORY_COLUMNS if c in df.columns]
+    return compact(df[ordered + [c for c in df.columns if c not in ordered]])
+
+
+class HistoryStore:
+    def __init__(self, root=HISTORY_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST)
+        self._manifest = []
+        self._manifest_stamp = None
+        os.makedirs(root, exist_ok=True)
+
+    # ---------- manifest ----------
+    def segments(self):
+        try:
+            stat = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return []
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp != self._manifest_stamp:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self._manifest = [json.loads(line) for line in f if line.strip()]
+            self._manifest_stamp = stamp
+        return self._manifest
+
+    def is_empty(self):
+        return not self.segments()
+
+    def row_count(self):
+        return sum(seg["rows"] for seg in self.segments())
+
+    # (min, max) `Completed At` across all segments, without reading any data
+    def bounds(self):
+        segs = self.segments()
+        if not segs:
+            return None
+        return pd.Timestamp(min(s["min"] for s in segs)), pd.Timestamp(max(s["max"] for s in segs))
+
+    # partition -> {"segments", "rows", "min", "max"} from the manifest alone
+    def partitions(self):
+        summary = {}
+        for seg in self.segments():
+            part = seg.get("partition") or pd.Timestamp(seg["min"]).strftime(PARTITION_FORMAT)
+            entry = summary.setdefault(part, {"segments": 0, "rows": 0, "min": seg["min"], "max": seg["max"]})
+            entry["segments"] += 1
+            entry["rows"] += seg["rows"]
+            entry["min"], entry["max"] = min(entry["min"], seg["min"]), max(entry["max"], seg["max"])
+        return dict(sorted(summary.items()))
+
+    # ---------- writes ----------
+    def append(self, df):
+        if df.empty:
+            return []
+        entries = self._write_partitioned(normalize_history(df.copy()))
+        with locked(self.manifest_path):
+            for entry in entries:
+                self._record(entry)
+        return entries
+
+    # One sorted segment per month of `df` (already normalized)
+    def _write_partitioned(self, df):
+        df = df.sort_values(TIME_COLUMN, kind="stable", ignore_index=True)
+        months = df[TIME_COLUMN].dt.strftime(PARTITION_FORMAT)
+        return [self._write_segment(df[(months == part).to_numpy()], part) for part in months.unique()]
+
+    def _write_segment(self, df, partition):
+        ext = "parquet" if HAS_PARQUET else "csv"
+        name = f"{partition}/seg-{time.time_ns()}-{os.getpid()}.{ext}"
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {
+            "file": name,
+            "partition": partition,
+            "rows": len(df),
+            "min": df[TIME_COLUMN].iloc[0].strftime(TIME_FORMAT),
+            "max": df[TIME_COLUMN].iloc[-1].strftime(TIME_FORMAT),
+            "schema": SCHEMA_VERSION,
+        }
+        if HAS_PARQUET:
+            df.to_parquet(path + ".tmp", index=False)
+        else:
+            df = df.copy()
+            df[TIME_COLUMN] = df[TIME_COLUMN].dt.strftime(TIME_FORMAT)
+            df.to_csv(path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
+        return entry
+
+    # Caller must hold the manifest lock
+    def _record(self, entry):
+        with open(self.manifest_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    # Caller must hold the manifest lock
+    def _rewrite_manifest(self, entries):
+        with open(self.manifest_path + ".tmp", "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(entry) + "\n" for entry in entries)
+        os.replace(self.manifest_path + ".tmp", self.manifest_path)
+
+    # ---------- reads ----------
+    def _read_segment(self, seg):
+        path = os.path.join(self.root, seg["file"])
+        if path.endswith(".parquet"):
+            df = pd.read_parquet(path)
+        else:
+            df = pd.read_csv(path)
+            df[TIME_COLUMN] = pd.to_datetime(df[TIME_COLUMN])
+        return compact(df)
+
+    # Rows with start <= Completed At < end (either bound may be None)
+    def query(self, start=None, end=None):
+        start = None if start is None else pd.Timestamp(start)
+        end = None if end is None else pd.Timestamp(end)
+        try:
+            return self._query(start, end)
+        except FileNotFoundError:
+            # A compaction swapped segments under us; the manifest now names the new ones
+            self._manifest_stamp = None
+            return self._query(start, end)
+
+    def _query(self, start, end):
+        parts = []
+        for seg in self.segments():
+            if start is not None and pd.Timestamp(seg["max"]) < start:
+                continue
+            if end is not None and pd.Timestamp(seg["min"]) >= end:
+                continue
+            df = self._read_segment(seg)
+            times = df[TIME_COLUMN]
+            lo = 0 if start is None else times.searchsorted(start, side="left")
+            hi = len(df) if end is None else times.searchsorted(end, side="left")
+            if hi > lo:
+                parts.append(df.iloc[lo:hi])
+
+        if not parts:
+            return pd.DataFrame()
+        return pd.concat(parts, ignore_index=True).sort_values(TIME_COLUMN, kind="stable", ignore_index=True)
+
+    # Rows completed on any day from start_date to end_date inclusive
+    def query_dates(self, start_date, end_date):
+        return self.query(pd.Timestamp(start_date), pd.Timestamp(end_date) + pd.Timedelta(days=1))
+
+    def read_all(self):
+        return self.query()
+
+
+# Merge each month's segments into one normalized segment and drop rows completed
+# before the retention window. Appends that land meanwhile are kept: only the
+# manifest entries that were compacted are swapped out. Returns a summary.
+def compact_history(store, retention_days=RETENTION_DAYS, now=None, dry_run=False):
+    with locked(os.path.join(store.root, "compaction")):  # one compaction at a time
+        return _compact(store, retention_days, now, dry_run)
+
+
+def _compact(store, retention_days, now, dry_run):
+    cutoff = None
+    if retention_days is not None:
+        cutoff = pd.Timestamp(now or pd.Timestamp.now()) - pd.Timedelta(days=retention_days)
+
+    by_partition = {}
+    for seg in list(store.segments()):
+        part = seg.get("partition") or pd.Timestamp(seg["min"]).strftime(PARTITION_FORMAT)
+        by_partition.setdefault(part, []).append(seg)
+
+    replaced, written = [], []
+    summary = {"partitions": len(by_partition), "merged": 0, "expired_rows": 0, "segments_before": 0, "segments_after": 0}
+    for part, segs in sorted(by_partition.items()):
+        summary["segments_before"] += len(segs)
+        expired = cutoff is not None and pd.Timestamp(max(s["max"] for s in segs)) < cutoff
+        trimmed = cutoff is not None and not expired and pd.Timestamp(min(s["min"] for s in segs)) < cutoff
+        tidy = len(segs) == 1 and segs[0].get("partition") == part and segs[0].get("schema") == SCHEMA_VERSION
+        if not (expired or trimmed or not tidy):
+            summary["segments_after"] += len(segs)
+            continue
+
+        replaced += segs
+        if expired:
+            summary["expired_rows"] += sum(s["rows"] for s in segs)
+            continue
+        df = normalize_history(pd.concat([store._read_segment(s) for s in segs], ignore_index=True))
+        if trimmed:
+            keep = (df[TIME_COLUMN] >= cutoff).to_numpy()
+            summary["expired_rows"] += int((~keep).sum())
+            df = df[keep]
+        summary["merged"] += 1
+        if not df.empty and not dry_run:
+            # Rows are always from `part`, except legacy flat segments that span months
+            written += store._write_partitioned(df)
+        summary["segments_after"] += df[TIME_COLUMN].dt.strftime(PARTITION_FORMAT).nunique() if not df.empty else 0
+
+    if dry_run or not replaced:
+        return summary
+
+    gone = {seg["file"] for seg in replaced}
+    with locked(store.manifest_path):
+        store._manifest_stamp = None
+        current = [seg for seg in store.segments() if seg["file"] not in gone]
+        store._rewrite_manifest(current + written)
+    for name in gone:
+        try:
+            os.remove(os.path.join(store.root, name))
+        except FileNotFoundError:
+            pass
+    for part in by_partition:
+        try:
+            os.rmdir(os.path.join(store.root, part))  # only succeeds once the partition is empty
+        except OSError:
+            pass
+    return summary
+
+
+# One-shot import of the old stock_history.csv; the store's manifest marks it done
+def migrate_csv(store, csv_path=LEGACY_CSV):
+    with locked(store.manifest_path):
+        if os.path.exists(store.manifest_path) or not os.path.exists(csv_path):
+            return 0
+        df = pd.read_csv(csv_path)
+        if df.empty or TIME_COLUMN not in df.columns:
+            return 0
+        for entry in store._write_partitioned(normalize_history(df)):
+            store._record(entry)
+    return len(df)
+
+
+def open_history(root=HISTORY_DIR, legacy_csv=LEGACY_CSV):
+    store = HistoryStore(root)
+    migrate_csv(store, legacy_csv)
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the completed-orders history store.")
+    parser.add_argument("--root", default=HISTORY_DIR)
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("migrate", help=f"import {LEGACY_CSV} once (the default command)")
+    compact_cmd = sub.add_parser("compact", help="merge each month into one segment, normalize the schema, apply retention")
+    compact_cmd.add_argument("--retention-days", type=int, default=RETENTION_DAYS,
+                             help="drop rows completed more than this many days ago (default HISTORY_RETENTION_DAYS, or keep all)")
+    compact_cmd.add_argument("--dry-run", action="store_true")
+    sub.add_parser("show", help="rows / segments / date range per monthly partition")
+    args = parser.parse_args()
+
+    store = HistoryStore(args.root)
+    if args.command == "compact":
+        print(compact_history(store, args.retention_days, dry_run=args.dry_run))
+    elif args.command == "show":
+        for part, info in store.partitions().items():
+            print(f"{part}  {info['rows']:>8,} rows  {info['segments']:>3} segment(s)  {info['min']} → {info['max']}")
+    else:
+        migrated = migrate_csv(store)
+        print(f"Migrated {migrated} rows from {LEGACY_CSV} into {args.root}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# 📈 Pre-aggregated inventory cube for the Analysis page
+#
+# Active (not Completed) orders are summed once into a small table keyed by
+# (City, Product line, Day). Week and month rollups are derived from that table
+# and cached. A filter change on the Analysis page is then a slice + sum over at
+# most cities x products x days cells instead of a groupby over every row.
+#
+# When stock or status edits are applied, the cube is updated with the delta of
+# just the edited rows (their old contribution out, their new one in) and the
+# cached rollups are patched with the same delta. `data_version` changes with
+# every applied delta, so charts cached from the cube (chart_data.py) go stale.
+
+import uuid
+
+import pandas as pd
+
+KEYS = ['City', 'Product line', 'Day']
+MEASURES = ['Needed Stock', 'Current Stock', 'Orders']
+PERIODS = {'W': 'Week', 'M': 'Month_Year'}
+
+
+def _aggregate(frame):
+    active = frame[frame['Status'] != "Completed"]
+    table = pd.DataFrame({
+        'City': active['City'],
+        'Product line': active['Product line'],
+        'Day': active['Date'].dt.normalize(),
+        'Needed Stock': active['Needed Stock'],
+        'Current Stock': active['Current Stock'],
+        'Orders': 1,
+    })
+    return table.groupby(KEYS, observed=True)[MEASURES].sum()
+
+
+def _roll(day_table, freq):
+    level = PERIODS[freq]
+    days = day_table.index.get_level_values('Day')
+    periods = pd.Index(days.to_period(freq).astype(str), name=level)
+    keys = [day_table.index.get_level_values('City'), day_table.index.get_level_values('Product line'), periods]
+    return day_table.groupby(keys, observed=True)[MEASURES].sum()
+
+
+def _merge(table, delta):
+    merged = table.add(delta, fill_value=0)
+    return merged[merged['Orders'] > 0]
+
+
+class InventoryCube:
+    def __init__(self, df):
+        self.day = _aggregate(df)
+        self._rollups = {}
+        self._token = uuid.uuid4().hex
+        self._version = 0
+
+    @property
+    def data_version(self):
+        return (self._token, self._version)
+
+    def rollup(self, freq):
+        if freq not in self._rollups:
+            self._rollups[freq] = _roll(self.day, freq)
+        return self._rollups[freq]
+
+    # `before` / `after` hold the same edited rows, prior to and after the edit
+    def apply_delta(self, before, after):
+        delta = _aggregate(after).sub(_aggregate(before), fill_value=0)
+        if delta.empty:
+            return
+        self._version += 1
+        self.day = _merge(self.day, delta)
+        for freq, table in self._rollups.items():
+            self._rollups[freq] = _merge(table, _roll(delta, freq))
+
+    def cities(self):
+        return self.day.index.get_level_values('City').unique().tolist()
+
+    def products(self):
+        return self.day.index.get_level_values('Product line').unique().tolist()
+
+    def _slice(self, table, cities, products):
+        city = table.index.get_level_values('City').isin(cities)
+        product = table.index.get_level_values('Product line').isin(products)
+        return table[city & product]
+
+    # Needed / Current Stock totals per product for the selected cities & products
+    def by_product(self, cities, products):
+        sliced = self._slice(self.day, cities, products)
+        return sliced.groupby(level='Product line', observed=True)[['Needed Stock', 'Current Stock']].sum().reset_index()
+
+    # Needed Stock per Day ('D'), Week ('W') or Month_Year ('M')
+    def trend(self, cities, products, freq='D'):
+        table = self.day if freq == 'D' else self.rollup(freq)
+        level = 'Day' if freq == 'D' else PERIODS[freq]
+        sliced = self._slice(table, cities, products)
+        trend = sliced.groupby(level=level)['Needed Stock'].sum().reset_index()
+        return trend.rename(columns={'Day': 'Date'})
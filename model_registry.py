@@ -0,0 +1,190 @@
+# 🧠 Process-wide model & encoder registry
+#
+# Streamlit re-executes new.py on every widget interaction, but imported modules
+# stay alive for the whole server process. Keeping the loaded artifacts here means
+# every session and every rerun shares one copy, and a file is only deserialized
+# again when it actually changes on disk. LabelEncoders are handed out as
+# category_encoder.CategoryEncoder.
+
+import hashlib
+import os
+import threading
+import time
+
+import joblib
+
+from category_encoder import fast_encoders
+from scoring import FEATURES
+from tracing import span
+
+MODEL_FILE = "clean_model.pkl"
+CITY_ENCODER_FILE = "clean_city_encoder.pkl"
+PRODUCT_ENCODER_FILE = "clean_product_encoder.pkl"
+
+# Versioned bundles written by train.py; artifacts/LATEST names the current one
+BUNDLE_DIR = os.environ.get("MODEL_BUNDLE_DIR", "artifacts")
+LATEST_FILE = "LATEST"
+
+# "sklearn" (pickled forest) or "compact" (array-backed forest, see compact_forest.py)
+MODEL_BACKEND = os.environ.get("MODEL_BACKEND", "sklearn")
+
+_lock = threading.Lock()
+_artifacts = {}  # path -> _Artifact
+_digests = {}    # path -> ((mtime, size), sha256)
+
+
+class _Artifact:
+    def __init__(self, path, obj, mtime, size, digest, load_seconds, resident_bytes):
+        self.path = path
+        self.obj = obj
+        self.mtime = mtime
+        self.size = size
+        self.digest = digest
+        self.load_seconds = load_seconds
+        self.resident_bytes = resident_bytes
+
+
+# Hash file contents in blocks so large models never sit in memory twice
+def file_digest(path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# Resident set size of this process in bytes (Linux); None where unavailable
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _load(path, digest, stat):
+    # mmap_mode only applies to numpy arrays stored uncompressed; joblib silently
+    # falls back to a normal load for anything else. Memory-mapped pages only
+    # count towards the resident size once they are touched.
+    rss_before = _rss_bytes()
+    start = time.perf_counter()
+    if path.endswith(".npz"):
+        from compact_forest import CompactForest
+        obj = CompactForest.load(path)
+    else:
+        obj = fast_encoders(joblib.load(path, mmap_mode="r"))
+    load_seconds = time.perf_counter() - start
+    rss_after = _rss_bytes()
+    resident_bytes = None if rss_before is None else max(0, rss_after - rss_before)
+    return _Artifact(path, obj, stat.st_mtime_ns, stat.st_size, digest, load_seconds, resident_bytes)
+
+
+# Return the loaded object for `path`, reloading only if the file changed
+def get_artifact(path):
+    stat = os.stat(path)
+    current = _artifacts.get(path)
+    if current is not None and current.mtime == stat.st_mtime_ns and current.size == stat.st_size:
+        return current.obj
+
+    with _lock:
+        current = _artifacts.get(path)
+        stat = os.stat(path)
+        if current is not None and current.mtime == stat.st_mtime_ns and current.size == stat.st_size:
+            return current.obj
+
+        # mtime moved: only reload when the contents really differ (e.g. `touch`)
+        digest = file_digest(path)
+        if current is not None and current.digest == digest:
+            current.mtime, current.size = stat.st_mtime_ns, stat.st_size
+            return current.obj
+
+        # Build the replacement fully before swapping it in, so concurrent
+        # readers see either the old artifact or the new one, never a partial.
+        with span("artifact_load"):
+            _artifacts[path] = _load(path, digest, stat)
+        return _artifacts[path].obj
+
+
+# Content hash of an artifact file, used as its version (does not load it)
+def artifact_version(path):
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _digests.get(path)
+    if cached is None or cached[0] != stamp:
+        art = _artifacts.get(path)
+        if art is not None and (art.mtime, art.size) == stamp:
+            digest = art.digest
+        else:
+            digest = file_digest(path)
+        _digests[path] = cached = (stamp, digest)
+    return cached[1]
+
+
+# Path of the bundle named by artifacts/LATEST, or None to use the legacy .pkl files
+def latest_bundle_path():
+    try:
+        with open(os.path.join(BUNDLE_DIR, LATEST_FILE), encoding="utf-8") as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    path = os.path.join(BUNDLE_DIR, version, "bundle.joblib")
+    return path if os.path.exists(path) else None
+
+
+# Compact .npz twin of a model/bundle file, compiled on first use
+def _compact_model(source_path):
+    from compact_forest import compact_path, compile_model
+    npz = compact_path(source_path)
+    with _lock:
+        if not os.path.exists(npz) or os.path.getmtime(npz) < os.path.getmtime(source_path):
+            compile_model(source_path, npz)
+    return get_artifact(npz)
+
+
+# Model, encoders and feature list, from the latest bundle or the legacy files
+def load_bundle():
+    compact = MODEL_BACKEND == "compact"
+    path = latest_bundle_path()
+    if path:
+        bundle = get_artifact(path)
+    else:
+        path = MODEL_FILE
+        bundle = {
+            "model": None if compact else get_artifact(MODEL_FILE),
+            "city_encoder": get_artifact(CITY_ENCODER_FILE),
+            "product_encoder": get_artifact(PRODUCT_ENCODER_FILE),
+            "features": FEATURES,
+            "metadata": {},
+        }
+    if compact:
+        bundle = {**bundle, "model": _compact_model(path)}
+    return bundle
+
+
+# ✅ Load Model & Encoders
+def load_artifacts():
+    bundle = load_bundle()
+    return bundle["model"], bundle["city_encoder"], bundle["product_encoder"]
+
+
+# Version of the model + encoders in use; changes whenever any of them is retrained
+def artifacts_version():
+    path = latest_bundle_path()
+    if path:
+        return artifact_version(path)[:16]
+    digests = [artifact_version(p) for p in (MODEL_FILE, CITY_ENCODER_FILE, PRODUCT_ENCODER_FILE)]
+    return hashlib.sha256("".join(digests).encode()).hexdigest()[:16]
+
+
+# Load time and resident size per artifact (for the dashboard / debugging)
+def artifact_stats():
+    stats = []
+    for path, art in sorted(_artifacts.items()):
+        stats.append({
+            "Artifact": path,
+            "Version": art.digest[:12],
+            "File Size (KB)": round(art.size / 1024, 1),
+            "Load Time (ms)": round(art.load_seconds * 1000, 2),
+            "Resident Size (KB)": None if art.resident_bytes is None else round(art.resident_bytes / 1024, 1),
+        })
+    return stats
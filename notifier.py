@@ -0,0 +1,327 @@
+# 📧 Batched background email digests for stock alerts
+#
+# When an applied edit pushes a row across its low-stock or high-gap threshold,
+# the Pending Orders page (views/pending.py) hands the crossing to
+# `AlertNotifier.notify`, which only merges it into an in-memory map per
+# recipient keyed by (City, Product line) and returns. A daemon worker wakes
+# every ALERT_DIGEST_INTERVAL seconds, swaps the maps out and sends one digest
+# per recipient over a single SMTP connection that is kept open (and re-opened
+# if the server dropped it) between digests, so the UI thread never waits on
+# SMTP. Only the recipients whose digest failed get it back in their queue
+# (merged with anything newer) for the next interval, so nobody receives the
+# same alerts twice. A recipient the server refuses
+# permanently (5xx) is dropped and listed in `refused`; a temporary refusal
+# (4xx) is retried up to ALERT_MAX_ATTEMPTS times before its digest is dropped.
+#
+# Configuration (environment):
+#   ALERT_RECIPIENTS         comma-separated addresses; notifications are off if empty
+#   ALERT_FROM               sender address (default smart-stock@localhost)
+#   ALERT_DIGEST_INTERVAL    seconds between digests (default 300)
+#   ALERT_MAX_ATTEMPTS       sends of a temporarily refused recipient's digest (default 5)
+#   SMTP_HOST / SMTP_PORT    default localhost:1025
+#   SMTP_USER / SMTP_PASSWORD / SMTP_STARTTLS=1
+#
+# Local testing:
+#   python notifier.py debug-server --port 1025      # prints every message it receives
+#   python notifier.py send-test --to me@example.com # sends a sample digest through it
+
+import argparse
+import asyncio
+import datetime
+import email
+import logging
+import os
+import smtplib
+import threading
+from email.mime.text import MIMEText
+
+log = logging.getLogger(__name__)
+
+RECIPIENTS = [r.strip() for r in os.environ.get("ALERT_RECIPIENTS", "").split(",") if r.strip()]
+SENDER = os.environ.get("ALERT_FROM", "smart-stock@localhost")
+DIGEST_INTERVAL = float(os.environ.get("ALERT_DIGEST_INTERVAL", 300))
+MAX_ATTEMPTS = int(os.environ.get("ALERT_MAX_ATTEMPTS", 5))
+SMTP_HOST = os.environ.get("SMTP_HOST", "localhost")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", 1025))
+SMTP_USER = os.environ.get("SMTP_USER")
+SMTP_PASSWORD = os.environ.get("SMTP_PASSWORD")
+SMTP_STARTTLS = os.environ.get("SMTP_STARTTLS", "0") == "1"
+
+KIND_LABELS = {'low_stock': "🔴 Low stock", 'high_gap': "⚠️ High gap"}
+
+
+# One alert event per crossed row: `crossed` is AlertEngine.apply's (row id, kind) list
+def alert_events(rows, crossed):
+    events = []
+    for row_id, kind in crossed:
+        row = rows.loc[row_id]
+        events.append({
+            'City': str(row['City']),
+            'Product line': str(row['Product line']),
+            'kind': kind,
+            'Current Stock': float(row['Current Stock']),
+            'Gap to Fulfill': float(row['Needed Stock'] - row['Current Stock']),
+        })
+    return events
+
+
+class _Entry:
+    __slots__ = ("kinds", "rows", "lowest_stock", "largest_gap", "first_seen", "last_seen")
+
+    def __init__(self, now):
+        self.kinds = set()
+        self.rows = 0
+        self.lowest_stock = None
+        self.largest_gap = None
+        self.first_seen = self.last_seen = now
+
+    def add(self, event, now):
+        self.kinds.add(event['kind'])
+        self.rows += 1
+        stock, gap = event['Current Stock'], event['Gap to Fulfill']
+        self.lowest_stock = stock if self.lowest_stock is None else min(self.lowest_stock, stock)
+        self.largest_gap = gap if self.largest_gap is None else max(self.largest_gap, gap)
+        self.last_seen = now
+
+    def merge(self, other):
+        self.kinds |= other.kinds
+        self.rows += other.rows
+        self.lowest_stock = min(x for x in (self.lowest_stock, other.lowest_stock) if x is not None)
+        self.largest_gap = max(x for x in (self.largest_gap, other.largest_gap) if x is not None)
+        self.first_seen = min(self.first_seen, other.first_seen)
+        self.last_seen = max(self.last_seen, other.last_seen)
+
+
+def format_digest(pending):
+    lines = [f"{len(pending)} City / Product line pairs crossed their stock alert thresholds:", ""]
+    for (city, product), entry in sorted(pending.items()):
+        kinds = ", ".join(KIND_LABELS[k] for k in sorted(entry.kinds))
+        lines.append(
+            f"- {city} · {product}: {kinds} — {entry.rows} order(s), "
+            f"lowest stock {entry.lowest_stock:.0f}, largest gap {entry.largest_gap:.0f} "
+            f"(last {entry.last_seen:%Y-%m-%d %H:%M})"
+        )
+    lines += ["", "Open the Smart Stock Dashboard's 🚨 Low Stock Alerts page for details."]
+    return "\n".join(lines)
+
+
+class AlertNotifier:
+    def __init__(self, recipients=RECIPIENTS, interval=DIGEST_INTERVAL, host=SMTP_HOST, port=SMTP_PORT):
+        self.recipients = list(recipients)
+        self.interval = interval
+        self.host, self.port = host, port
+        self.sent_digests = 0
+        self.refused = {}  # recipient -> server reply, for permanently refused addresses
+        self._pending = {}  # recipient -> {(City, Product line) -> _Entry}
+        self._attempts = {}  # recipient -> failed sends of its current digest
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._smtp = None
+        self._worker = None
+
+    @property
+    def enabled(self):
+        return bool(self.recipients)
+
+    def start(self):
+        if self.enabled and self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="alert-digest", daemon=True)
+            self._worker.start()
+        return self
+
+    # Queue events without blocking; repeats of a (City, Product line) are merged
+    def notify(self, events):
+        if not self.enabled or not events:
+            return
+        now = datetime.datetime.now()
+        with self._lock:
+            for recipient in self.recipients:
+                queue = self._pending.setdefault(recipient, {})
+                for event in events:
+                    key = (event['City'], event['Product line'])
+                    entry = queue.get(key)
+                    if entry is None:
+                        entry = queue[key] = _Entry(now)
+                    entry.add(event, now)
+
+    # Distinct (City, Product line) pairs waiting for at least one recipient
+    def pending_count(self):
+        with self._lock:
+            return len({key for queue in self._pending.values() for key in queue})
+
+    # Send whatever is queued now (from the worker, or directly in tests / CLI);
+    # returns the number of digests delivered
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        sent = 0
+        failed = None
+        for recipient, queue in pending.items():
+            if failed is None:
+                try:
+                    self._send(recipient, queue)
+                    self._attempts.pop(recipient, None)
+                    sent += 1
+                    continue
+                except smtplib.SMTPRecipientsRefused as exc:
+                    code, reply = exc.recipients.get(recipient, (550, b""))
+                    if code >= 500:
+                        self._refuse(recipient, code, reply)
+                        continue
+                    attempts = self._attempts[recipient] = self._attempts.get(recipient, 0) + 1
+                    if attempts >= MAX_ATTEMPTS:
+                        log.error("Alert digest to %s refused %d times, dropping it: %s", recipient, attempts, exc)
+                        self._attempts.pop(recipient)
+                        continue
+                    log.warning("Alert digest to %s refused, retrying next interval: %s", recipient, exc)
+                except (smtplib.SMTPException, OSError) as exc:
+                    # The server is unreachable: keep the rest for the next interval too
+                    log.warning("Alert digest failed, retrying next interval: %s", exc)
+                    self._close()
+                    failed = exc
+            self._requeue(recipient, queue)
+        return sent
+
+    # Permanent refusal: stop queueing for the address and drop what it had queued
+    def _refuse(self, recipient, code, reply):
+        reply = reply.decode("utf-8", "replace") if isinstance(reply, bytes) else str(reply)
+        log.error("Alert recipient %s refused permanently (%s %s), no longer notified", recipient, code, reply)
+        with self._lock:
+            self.refused[recipient] = f"{code} {reply}".strip()
+            self.recipients = [r for r in self.recipients if r != recipient]
+            self._pending.pop(recipient, None)
+        self._attempts.pop(recipient, None)
+
+    def _requeue(self, recipient, queue):
+        with self._lock:
+            current = self._pending.setdefault(recipient, {})
+            for key, entry in queue.items():
+                if key in current:
+                    entry.merge(current[key])
+                current[key] = entry
+
+    def stop(self):
+        self._stopping = True
+        self._wake.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        self._close()
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def _connection(self):
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close()
+        smtp = smtplib.SMTP(self.host, self.port, timeout=30)
+        if SMTP_STARTTLS:
+            smtp.starttls()
+        if SMTP_USER:
+            smtp.login(SMTP_USER, SMTP_PASSWORD or "")
+        self._smtp = smtp
+        return smtp
+
+    def _close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+    def _send(self, recipient, pending):
+        msg = MIMEText(format_digest(pending), "plain", "utf-8")
+        msg['Subject'] = f"[Smart Stock] {len(pending)} stock alert(s)"
+        msg['From'] = SENDER
+        msg['To'] = recipient
+        self._connection().sendmail(SENDER, [recipient], msg.as_string())
+        self.sent_digests += 1
+
+
+# ---------- local debugging SMTP server (prints messages instead of delivering) ----------
+async def _debug_session(reader, writer):
+    writer.write(b"220 smart-stock debug SMTP\r\n")
+    data = None
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        if data is not None:
+            if line in (b".\r\n", b".\n"):
+                msg = email.message_from_bytes(b"".join(data))
+                print("-" * 20, f"To: {msg['To']} | Subject: {msg['Subject']}", "-" * 20)
+                print(msg.get_payload(decode=True).decode("utf-8", "replace"), flush=True)
+                data = None
+                writer.write(b"250 OK\r\n")
+            else:
+                data.append(line[1:] if line.startswith(b"..") else line)
+            continue
+        command = line[:4].upper()
+        if command == b"DATA":
+            data = []
+            writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+        elif command == b"QUIT":
+            writer.write(b"221 Bye\r\n")
+            await writer.drain()
+            break
+        else:  # HELO / EHLO / MAIL / RCPT / RSET / NOOP
+            writer.write(b"250 OK\r\n")
+        await writer.drain()
+    writer.close()
+
+
+async def _debug_server(host, port):
+    server = await asyncio.start_server(_debug_session, host, port)
+    print(f"Debug SMTP server on {host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stock alert email digests.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    debug = sub.add_parser("debug-server", help="run a local SMTP server that prints messages")
+    debug.add_argument("--host", default="localhost")
+    debug.add_argument("--port", type=int, default=SMTP_PORT)
+    test = sub.add_parser("send-test", help="send a sample digest through the configured SMTP server")
+    test.add_argument("--to", action="append", default=None, help="recipient (repeatable; default ALERT_RECIPIENTS)")
+    args = parser.parse_args()
+
+    if args.command == "debug-server":
+        try:
+            asyncio.run(_debug_server(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    notifier = AlertNotifier(recipients=args.to or RECIPIENTS)
+    if not notifier.enabled:
+        parser.error("no recipients: pass --to or set ALERT_RECIPIENTS")
+    notifier.notify([
+        {'City': "Mumbai", 'Product line': "Amul Butter", 'kind': "low_stock", 'Current Stock': 4, 'Gap to Fulfill': 62},
+        {'City': "Mumbai", 'Product line': "Amul Butter", 'kind': "high_gap", 'Current Stock': 0, 'Gap to Fulfill': 131},
+        {'City': "Delhi", 'Product line': "Tata Salt", 'kind': "low_stock", 'Current Stock': 11, 'Gap to Fulfill': 40},
+    ])
+    sent = notifier.flush()
+    notifier.stop()
+    if not sent:
+        raise SystemExit(f"Could not send via {notifier.host}:{notifier.port}")
+    print(f"Sent {sent} digest(s) to {', '.join(notifier.recipients)} via {notifier.host}:{notifier.port}")
+    if notifier.refused:
+        print("Refused: " + "; ".join(f"{r} ({reply})" for r, reply in notifier.refused.items()))
+    if notifier.pending_count() or notifier.refused:
+        raise SystemExit("Some recipients could not be reached; see the log above")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+# 📦 Vectorized helpers for the paginated Pending Orders editor
+#
+# The page used to build six widgets per row and write edits back one cell at a
+# time with `.at[i, ...]`, which is why it was capped at 20 rows. These helpers
+# work on whole pages (and whole frames) at once: edits are detected as a row
+# diff and recorded in the session's working_set.WorkingSet delta log. Alert
+# flags come from alert_engine.
+
+import math
+
+EDITABLE_COLUMNS = ['Current Stock', 'Status']
+STATUS_OPTIONS = ["Pending", "Completed"]
+
+
+# (start, stop, n_pages) for a 1-based page number
+def page_bounds(n_rows, page, page_size):
+    n_pages = max(1, math.ceil(n_rows / page_size))
+    page = min(max(1, page), n_pages)
+    start = (page - 1) * page_size
+    return start, min(start + page_size, n_rows), n_pages
+
+
+# Rows of `after` whose editable columns differ from `before` (same index)
+def changed_rows(before, after, columns=EDITABLE_COLUMNS):
+    before = before.loc[after.index, columns]
+    mask = (before != after[columns]).any(axis=1)
+    return after.loc[mask, columns]
+
@@ -0,0 +1,161 @@
+# ⚡ Content-addressed prediction cache
+#
+# Scored frames are keyed by (hash of the uploaded CSV bytes, model version), so a
+# rerun on an unchanged upload skips feature engineering and inference entirely.
+# The memory tier is an LRU bounded by a byte budget; an optional on-disk tier
+# (PREDICTION_CACHE_DIR) survives server restarts and absorbs memory evictions.
+# A cached value is a frame or a tuple of frames (e.g. a scored upload and its
+# rejection report), stored, sized and evicted as one entry.
+#
+# The byte-budget LRU itself (LRUCache) is also what the export and chart caches use.
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+MEMORY_BUDGET_BYTES = int(os.environ.get("PREDICTION_CACHE_BYTES", 512 * 1024 * 1024))
+DISK_DIR = os.environ.get("PREDICTION_CACHE_DIR")
+DISK_BUDGET_BYTES = int(os.environ.get("PREDICTION_CACHE_DISK_BYTES", 4 * 1024 * 1024 * 1024))
+# Part of every disk file name: bump when the cached value's layout changes, so
+# files written by older builds are never read (they age out of the disk budget)
+ENTRY_FORMAT = 2  # 2: (scored frame, rejection report)
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def frame_bytes(df):
+    if isinstance(df, tuple):
+        return sum(frame_bytes(part) for part in df)
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _copy(df):
+    return tuple(part.copy() for part in df) if isinstance(df, tuple) else df.copy()
+
+
+# Thread-safe LRU bounded by the total size of its values (`sizeof`, bytes), with
+# hit / miss counts; the prediction, export and chart caches are built on it
+class LRUCache:
+    def __init__(self, budget_bytes, sizeof=frame_bytes):
+        self.budget_bytes = budget_bytes
+        self.sizeof = sizeof
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (value, nbytes)
+        self._lock = threading.Lock()
+
+    # Cached value (counted as a hit), or None without counting a miss
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get(self, key):
+        value = self._lookup(key)
+        if value is None:
+            with self._lock:
+                self.misses += 1
+        return value
+
+    # Values larger than the whole budget are not cached
+    def put(self, key, value):
+        nbytes = self.sizeof(value)
+        if nbytes > self.budget_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.used_bytes -= old[1]
+            self._entries[key] = (value, nbytes)
+            self.used_bytes += nbytes
+            while self.used_bytes > self.budget_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.used_bytes -= evicted
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "used_bytes": self.used_bytes,
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# LRU of scored frames plus the optional disk tier; callers get private copies
+class PredictionCache(LRUCache):
+    def __init__(self, budget_bytes=MEMORY_BUDGET_BYTES, disk_dir=DISK_DIR, disk_budget_bytes=DISK_BUDGET_BYTES):
+        super().__init__(budget_bytes)
+        self.disk_dir = disk_dir
+        self.disk_budget_bytes = disk_budget_bytes
+        self.disk_hits = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key[0]}-{key[1]}-v{ENTRY_FORMAT}.pkl")
+
+    # Returns a private copy of the cached frame(s), or None
+    def get(self, key):
+        df = self._lookup(key)
+        if df is not None:
+            return _copy(df)
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            if os.path.exists(path):
+                df = pd.read_pickle(path)
+                os.utime(path)  # keep disk eviction roughly LRU
+                super().put(key, df)
+                with self._lock:
+                    self.disk_hits += 1
+                return _copy(df)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, df):
+        df = _copy(df)
+        super().put(key, df)
+        if self.disk_dir:
+            self._put_disk(key, df)
+
+    def _put_disk(self, key, df):
+        path = self._disk_path(key)
+        tmp = path + ".tmp"
+        pd.to_pickle(df, tmp)
+        os.replace(tmp, path)
+
+        files = [os.path.join(self.disk_dir, f) for f in os.listdir(self.disk_dir) if f.endswith(".pkl")]
+        files.sort(key=os.path.getmtime)
+        total = sum(os.path.getsize(f) for f in files)
+        while total > self.disk_budget_bytes and files:
+            oldest = files.pop(0)
+            total -= os.path.getsize(oldest)
+            os.remove(oldest)
+
+    def stats(self):
+        return dict(super().stats(), disk_hits=self.disk_hits)
+
+
+# One cache per server process, shared by all sessions
+prediction_cache = PredictionCache()
@@ -0,0 +1,38 @@
+# 🔮 Feature engineering + prediction shared by the dashboard and batch jobs
+
+import pandas as pd
+
+from tracing import span
+
+DATE_FORMAT = '%d-%m-%Y'
+FEATURES = ['Year', 'Month', 'Day', 'Weekday', 'City_encoded', 'Product_encoded', 'Unit price', 'Quantity']
+
+
+# Calendar fields + encoded City / Product line (+ demand history when the bundle
+# ships a feature_store.FeatureStore). With extend_store the frame's own
+# Quantity extends the history for days after the store's last day; without it
+# each row's features depend on the shipped store alone.
+def add_features(df, city_encoder, product_encoder, feature_store=None, extend_store=True):
+    with span("to_datetime"):
+        df['Date'] = pd.to_datetime(df['Date'], format=DATE_FORMAT)
+        df['Year'] = df['Date'].dt.year
+        df['Month'] = df['Date'].dt.month
+        df['Day'] = df['Date'].dt.day
+        df['Weekday'] = df['Date'].dt.weekday
+    with span("encode"):
+        df['City_encoded'] = city_encoder.transform(df['City'])
+        df['Product_encoded'] = product_encoder.transform(df['Product line'])
+    if feature_store is not None:
+        with span("demand_features"):
+            store = feature_store.extended(df) if extend_store else feature_store
+            demand = store.features(df)
+            df[demand.columns] = demand
+    return df
+
+
+# Add features and the model's Predicted Quantity column
+def score_frame(df, model, city_encoder, product_encoder, features=FEATURES, feature_store=None, extend_store=True):
+    df = add_features(df, city_encoder, product_encoder, feature_store, extend_store)
+    with span("predict"):
+        df['Predicted Quantity'] = model.predict(df[features])
+    return df
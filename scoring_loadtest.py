@@ -0,0 +1,87 @@
+# 🚦 Load-test client for scoring_service.py
+#
+# Opens --concurrency keep-alive connections and fires --requests single-record
+# POST /predict calls built from rows of the dataset, then reports p50/p90/p99
+# latency and throughput.
+#
+# Usage:
+#   python scoring_loadtest.py --url http://127.0.0.1:8765 --requests 5000 --concurrency 64
+
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+
+from scoring_service import INPUT_COLUMNS
+
+
+def sample_records(path, n):
+    df = pd.read_csv(path, usecols=INPUT_COLUMNS)
+    rows = df.sample(n=n, replace=len(df) < n, random_state=0)
+    return rows.to_dict(orient="records")
+
+
+async def _client(host, port, records, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for record in records:
+            body = json.dumps(record).encode()
+            request = (
+                f"POST /predict HTTP/1.1\r\nHost: {host}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+            ).encode() + body
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if b" 200 " not in status_line:
+                errors.append(status_line.decode().strip())
+    finally:
+        writer.close()
+
+
+async def run(url, records, concurrency):
+    target = urlparse(url)
+    latencies, errors = [], []
+    shards = [records[i::concurrency] for i in range(concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(target.hostname, target.port, shard, latencies, errors) for shard in shards if shard))
+    return latencies, errors, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the local scoring service.")
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--data", default="Cleaned_Walmart_Stock_Analysis.csv")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    records = sample_records(args.data, args.requests)
+    latencies, errors, elapsed = asyncio.run(run(args.url, records, args.concurrency))
+
+    ms = np.array(latencies) * 1000
+    print(f"{len(ms):,} requests, {args.concurrency} connections, {elapsed:.2f}s")
+    print(f"throughput: {len(ms) / elapsed:,.0f} req/s")
+    print(f"latency ms: p50={np.percentile(ms, 50):.2f}  p90={np.percentile(ms, 90):.2f}  "
+          f"p99={np.percentile(ms, 99):.2f}  max={ms.max():.2f}")
+    if errors:
+        print(f"{len(errors)} errors, e.g. {errors[0]}")
+
+
+if __name__ == "__main__":
+    main()
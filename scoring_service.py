@@ -0,0 +1,240 @@
+# 🛰️ Local HTTP prediction service with asyncio micro-batching
+#
+# Replenishment jobs can score records without the Streamlit UI:
+#
+#   POST /predict  {"City": "Mumbai", "Product line": "Amul Butter",
+#                   "Date": "05-01-2019", "Unit price": 74.69, "Quantity": 67}
+#   -> {"Predicted Quantity": 91.2}
+#
+# Cities / products not seen in training are scored with the encoders' unknown
+# bucket and flagged: {"Predicted Quantity": 64.0, "unseen": ["City"]}.
+#
+# A JSON list of records is scored as one batch and answered with a list.
+# Concurrent single-record requests wait in an asyncio queue for up to
+# --max-wait-ms, then are scored together with one model.predict call (in a
+# worker thread, so the event loop keeps accepting connections), and each
+# caller gets its own row back. Feature engineering, encoders and model are
+# the same ones new.py uses (scoring.py + model_registry.py). Demand features
+# come from the bundle's shipped feature store only, never from other records
+# in the batch, so a prediction does not depend on concurrent traffic.
+#
+# Usage:
+#   python scoring_service.py --port 8765 --max-wait-ms 5 --max-batch 256
+#   python scoring_service.py --check          # scoring alone == scoring in a batch
+#   python scoring_loadtest.py --url http://127.0.0.1:8765 --requests 5000 --concurrency 64
+
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from category_encoder import ENCODED_COLUMNS
+from model_registry import load_bundle
+from scoring import DATE_FORMAT, score_frame
+
+INPUT_COLUMNS = ['City', 'Product line', 'Date', 'Unit price', 'Quantity']
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+
+def score_records(records):
+    bundle = load_bundle()
+    df = pd.DataFrame.from_records(records, columns=INPUT_COLUMNS)
+    scored = score_frame(df, bundle['model'], bundle['city_encoder'], bundle['product_encoder'], bundle['features'],
+                         bundle.get('feature_store'), extend_store=False)
+    results = [{"Predicted Quantity": p} for p in scored['Predicted Quantity'].astype(float).tolist()]
+    # Flag fields scored with the encoders' unknown bucket
+    for encoded, (column, key) in ENCODED_COLUMNS.items():
+        for i in np.flatnonzero(scored[encoded].to_numpy() == bundle[key].unknown_code):
+            results[i].setdefault("unseen", []).append(column)
+    return results
+
+
+# Records whose prediction differs when scored alone vs. in one batch (should be none)
+def batch_mismatches(records, tolerance=1e-6):
+    batched = score_records(records)
+    return [(record, alone["Predicted Quantity"], together["Predicted Quantity"])
+            for record, together in zip(records, batched)
+            for alone in score_records([record])
+            if abs(alone["Predicted Quantity"] - together["Predicted Quantity"]) > tolerance]
+
+
+def validate(record):
+    if not isinstance(record, dict):
+        raise ValueError("each record must be a JSON object")
+    missing = [col for col in INPUT_COLUMNS if col not in record]
+    if missing:
+        raise ValueError(f"missing fields: {', '.join(missing)}")
+    return {col: record[col] for col in INPUT_COLUMNS}
+
+
+class MicroBatcher:
+    def __init__(self, max_wait_ms=5.0, max_batch=256):
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.records = 0
+
+    async def submit(self, record):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((record, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._score(batch)
+
+    async def _score(self, batch):
+        loop = asyncio.get_running_loop()
+        records = [record for record, _ in batch]
+        try:
+            results = await loop.run_in_executor(None, score_records, records)
+        except Exception:
+            # One bad record (e.g. an unparseable date) must not fail its neighbours:
+            # retry one by one so only the offending request gets the error.
+            results = []
+            for record in records:
+                try:
+                    results.append((await loop.run_in_executor(None, score_records, [record]))[0])
+                except Exception as exc:
+                    results.append(exc)
+        self.batches += 1
+        self.records += len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+class ScoringServer:
+    def __init__(self, batcher):
+        self.batcher = batcher
+        self.started = time.time()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    await self._send(writer, 413, {"error": "request body too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self.route(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close" and version.strip() == "HTTP/1.1"
+                await self._send(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body):
+        if method == "GET" and path == "/health":
+            return 200, {
+                "status": "ok",
+                "uptime_seconds": round(time.time() - self.started, 1),
+                "batches": self.batcher.batches,
+                "records": self.batcher.records,
+            }
+        if method != "POST" or path != "/predict":
+            return 404, {"error": "use POST /predict or GET /health"}
+
+        try:
+            payload = json.loads(body or b"null")
+            if isinstance(payload, list):
+                records = [validate(r) for r in payload]
+                return 200, await asyncio.get_running_loop().run_in_executor(None, score_records, records)
+            return 200, await self.batcher.submit(validate(payload))
+        except (ValueError, KeyError) as exc:
+            return 400, {"error": str(exc)}
+        except Exception as exc:
+            return 500, {"error": str(exc)}
+
+    async def _send(self, writer, status, payload, keep_alive):
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large"}.get(status, "Error")
+        body = json.dumps(payload).encode()
+        head = (
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode() + body)
+        await writer.drain()
+
+
+async def serve(host, port, max_wait_ms, max_batch):
+    load_bundle()  # warm the registry before accepting traffic
+    batcher = MicroBatcher(max_wait_ms, max_batch)
+    server = ScoringServer(batcher)
+    batch_task = asyncio.create_task(batcher.run())
+    async with await asyncio.start_server(server.handle, host, port) as srv:
+        print(f"Scoring service on http://{host}:{port} (max wait {max_wait_ms} ms, max batch {max_batch})", flush=True)
+        try:
+            await srv.serve_forever()
+        finally:
+            batch_task.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve stock predictions over HTTP with micro-batching.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="how long a request may wait for batch-mates")
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--check", action="store_true",
+                        help="score sample records alone and batched, fail if any prediction differs, then exit")
+    parser.add_argument("--data", default="Cleaned_Walmart_Stock_Analysis.csv", help="records for --check")
+    parser.add_argument("--records", type=int, default=64, help="sample size for --check")
+    args = parser.parse_args()
+    if args.check:
+        df = pd.read_csv(args.data, usecols=INPUT_COLUMNS)
+        df = df.sample(n=min(args.records, len(df)), random_state=0)
+        # ... plus the same records moved past the data (and the shipped store's last day)
+        dates = pd.to_datetime(df['Date'], format=DATE_FORMAT)
+        later = df.assign(Date=(dates + (dates.max() - dates.min() + pd.Timedelta(days=1))).dt.strftime(DATE_FORMAT))
+        records = pd.concat([df, later]).to_dict(orient="records")
+        mismatches = batch_mismatches(records)
+        for record, alone, together in mismatches[:10]:
+            print(f"{record}: alone {alone:.4f}, batched {together:.4f}")
+        print(f"{len(records) - len(mismatches)}/{len(records)} records score the same alone and batched")
+        raise SystemExit(1 if mismatches else 0)
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_wait_ms, args.max_batch))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# 🔍 Substring search index for the low-cardinality Product line / City columns
+#
+# `str.contains(term, case=False)` scans every row on every keystroke. Here each
+# column is factorized once into its distinct values, each distinct value gets a
+# packed row bitmap, and a trigram index maps lowercase 3-grams to the values that
+# contain them. A search term is resolved against the distinct values only
+# (trigram candidates, then a substring check), the matching bitmaps are OR-ed,
+# and the per-column results are AND-ed together.
+
+import numpy as np
+import pandas as pd
+
+NGRAM = 3
+
+
+def _ngrams(text, n=NGRAM):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class _ColumnIndex:
+    def __init__(self, series):
+        codes, values = pd.factorize(series)
+        self.values = [str(v).lower() for v in values]
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(values) + 1))
+        self.bitmaps = []
+        for v in range(len(values)):
+            mask = np.zeros(len(codes), dtype=bool)
+            mask[order[bounds[v]:bounds[v + 1]]] = True
+            self.bitmaps.append(np.packbits(mask))
+        self.grams = {}
+        for v, text in enumerate(self.values):
+            for gram in _ngrams(text):
+                self.grams.setdefault(gram, set()).add(v)
+
+    # Ids of distinct values containing `term` (case-insensitive)
+    def matching_values(self, term):
+        term = term.lower()
+        if len(term) < NGRAM:
+            candidates = range(len(self.values))
+        else:
+            postings = [self.grams.get(gram, set()) for gram in _ngrams(term)]
+            candidates = set.intersection(*postings)
+        return [v for v in candidates if term in self.values[v]]
+
+    def bitmap(self, term, n_bytes):
+        result = np.zeros(n_bytes, dtype=np.uint8)
+        for v in self.matching_values(term):
+            np.bitwise_or(result, self.bitmaps[v], out=result)
+        return result
+
+
+class SearchIndex:
+    def __init__(self, df, columns=('Product line', 'City')):
+        self.n_rows = len(df)
+        self.n_bytes = (self.n_rows + 7) // 8
+        self.columns = {col: _ColumnIndex(df[col]) for col in columns}
+        self._cache = {}
+
+    # Boolean row mask for {column: substring} terms, AND-ed across columns.
+    # Like str.contains(..., na=False), an empty term matches every non-null row.
+    def match(self, terms):
+        key = tuple(sorted(terms.items()))
+        if key not in self._cache:
+            result = np.full(self.n_bytes, 0xFF, dtype=np.uint8)
+            for col, term in terms.items():
+                np.bitwise_and(result, self.columns[col].bitmap(term, self.n_bytes), out=result)
+            if len(self._cache) > 256:
+                self._cache.clear()
+            self._cache[key] = np.unpackbits(result, count=self.n_rows).astype(bool)
+        return self._cache[key]
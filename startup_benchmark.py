@@ -0,0 +1,116 @@
+# 🚀 Dashboard startup benchmark: time-to-login-screen and time-to-first-prediction
+#
+# Every scenario runs new.py through Streamlit's AppTest in a fresh Python
+# process, so imports and the model load are as cold as on a freshly started
+# server. Streamlit itself is imported before the clock starts, as a server has
+# it loaded before the first session arrives.
+#
+#   login        a new visitor's first run, up to the rendered login screen
+#   help         a logged-in session's first run, then switching to the Help page
+#   prediction   a logged-in session's first run, then an upload until the
+#                scored table is on screen (the prediction cache starts empty)
+#
+# Each scenario also reports which heavy modules the app itself imported.
+#
+# Usage:
+#   python startup_benchmark.py
+#   python startup_benchmark.py --data big.csv --repeat 5 --json benchmarks/startup.json
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SCENARIOS = ("login", "help", "prediction")
+HEAVY_MODULES = ("plotly.express", "sklearn", "joblib", "smtplib", "pyarrow")
+DEFAULT_DATA = "Cleaned_Walmart_Stock_Analysis.csv"
+APP = "new.py"
+
+
+# ---------- child side: one scenario in this (fresh) process ----------
+def _login(at):
+    at.session_state["authenticated"] = True
+    at.session_state["username"] = "benchmark"
+    at.session_state["role"] = "user"
+
+
+def run_scenario(name, data):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=600)
+    preloaded = set(sys.modules)
+    stages = {}
+    start = time.perf_counter()
+
+    if name == "login":
+        at.run()
+        stages['login_screen'] = time.perf_counter() - start
+    elif name == "help":
+        _login(at)
+        at.run()
+        at.sidebar.radio[0].set_value("❓ Help & Demo").run()
+        stages['help_page'] = time.perf_counter() - start
+    else:
+        _login(at)
+        at.run()
+        stages['dashboard_shell'] = time.perf_counter() - start
+        with open(data, "rb") as f:
+            payload = f.read()
+        mime = "application/octet-stream" if data.endswith(".parquet") else "text/csv"
+        at.sidebar.file_uploader[0].set_value((os.path.basename(data), payload, mime)).run()
+        stages['first_prediction'] = time.perf_counter() - start
+        if not at.dataframe:
+            raise RuntimeError("no scored table was rendered")
+
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return {
+        'seconds': stages,
+        'heavy_modules': [m for m in HEAVY_MODULES if m in sys.modules and m not in preloaded],
+    }
+
+
+# ---------- parent side ----------
+def measure(name, data):
+    env = {k: v for k, v in os.environ.items() if k != "PREDICTION_CACHE_DIR"}
+    out = subprocess.run([sys.executable, __file__, "--child", name, "--data", data],
+                         capture_output=True, text=True, env=env)
+    if out.returncode != 0:
+        raise SystemExit(f"{name} failed:\n{out.stderr[-2000:]}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start timings of the Streamlit dashboard.")
+    parser.add_argument("--data", default=DEFAULT_DATA, help="file uploaded in the prediction scenario")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh processes per scenario (median is reported)")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--json", default=None, help="also write the results to this JSON file")
+    parser.add_argument("--child", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scenario(args.child, args.data)))
+        return
+
+    results = {}
+    for name in args.scenarios:
+        runs = [measure(name, args.data) for _ in range(args.repeat)]
+        seconds = {stage: round(statistics.median(run['seconds'][stage] for run in runs), 3)
+                   for stage in runs[0]['seconds']}
+        results[name] = {'seconds': seconds, 'heavy_modules': runs[-1]['heavy_modules']}
+        timings = "  ".join(f"{stage} {value:.3f}s" for stage, value in seconds.items())
+        print(f"{name:<11} {timings}  imports: {', '.join(results[name]['heavy_modules']) or '-'}")
+
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or ".", exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump({'data': args.data, 'repeat': args.repeat, 'results': results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# 🌊 Chunked ingest-and-score pipeline for very large Walmart exports
+#
+# Reads the CSV (or Parquet row batches) in fixed-size chunks, runs the same
+# feature step + model as the dashboard on each chunk, appends the scored rows to
+# an output CSV and folds the chunk into running (City, Product line)
+# aggregates. Only one chunk and the small aggregate table are ever held in
+# memory, so peak memory does not grow with the input size.
+#
+# Each chunk goes through the upload path's validation (csv_ingest.validate):
+# rows with bad dates / numbers / empty required cells, and malformed lines, are
+# left out and appended to a rejection report on disk instead of stopping the
+# run; only their count is kept in memory. Scored rows and rejected rows are
+# written to "<path>.tmp" and only moved into place when the whole input was
+# read, so a failed run leaves no partial output behind.
+#
+# Usage:
+#   python stream_scoring.py big_export.csv --out scored.csv --aggregates totals.csv --rejected rejected.csv
+
+import argparse
+import os
+import time
+import warnings
+
+import pandas as pd
+
+from compact_schema import compact
+from csv_ingest import malformed_report, text_read_options, validate
+from model_registry import load_bundle
+from scoring import score_frame
+
+DEFAULT_CHUNKSIZE = 100_000
+GROUP_KEYS = ['City', 'Product line']
+AGG_COLUMNS = ['Quantity', 'Predicted Quantity']
+
+
+# (chunk, messages for lines skipped as malformed) pairs; CSV schema columns are
+# read as text for validate(). Row labels continue across chunks.
+def iter_chunks(src, chunksize):
+    name = str(getattr(src, "name", src))
+    if name.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        start = 0
+        for batch in pq.ParquetFile(src).iter_batches(batch_size=chunksize):
+            chunk = batch.to_pandas()
+            chunk.index += start
+            start += len(chunk)
+            yield chunk, []
+        return
+    reader = pd.read_csv(src, chunksize=chunksize, on_bad_lines='warn', **text_read_options())
+    while True:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", pd.errors.ParserWarning)
+            chunk = next(reader, None)
+        skipped = [line for w in caught if issubclass(w.category, pd.errors.ParserWarning)
+                   for line in str(w.message).splitlines() if line.strip()]
+        if chunk is None:
+            return
+        yield chunk, skipped
+
+
+# Score `src` chunk by chunk, writing scored rows to `out_path` and rejected rows
+# to `rejected_path`; returns (aggregates, summary). Raises
+# csv_ingest.IngestError before writing anything if required columns are missing.
+def stream_score(src, out_path=None, chunksize=DEFAULT_CHUNKSIZE, on_chunk=None, rejected_path=None):
+    bundle = load_bundle()
+    model, city_encoder, product_encoder = bundle["model"], bundle["city_encoder"], bundle["product_encoder"]
+
+    aggregates = None
+    rejected = 0
+    rows = 0
+    chunks = 0
+    written = False  # rows appended to tmp_path yet
+    rejected_written = False
+    min_date = max_date = None
+    start = time.perf_counter()
+
+    tmp_path = out_path + ".tmp" if out_path else None
+    rejected_tmp = rejected_path + ".tmp" if rejected_path else None
+    for path in (tmp_path, rejected_tmp):
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    # Demand features: each chunk's new days are folded into a running copy of the
+    # store, so later chunks see earlier ones (exact for date-ordered inputs)
+    feature_store = bundle.get("feature_store")
+
+    try:
+        for raw, skipped in iter_chunks(src, chunksize):
+            chunk, report = validate(raw)
+            if skipped:
+                report = pd.concat([malformed_report(skipped, report.columns), report], ignore_index=True)
+            rejected += len(report)
+            # The first chunk's report is written even when empty, so a clean
+            # file still gets a report with its own columns (validate's empty_report)
+            if rejected_tmp and (len(report) or not rejected_written):
+                report.to_csv(rejected_tmp, mode='a', header=not rejected_written, index=False)
+                rejected_written = True
+            chunks += 1
+            if chunk.empty:
+                continue
+
+            chunk = compact(chunk)
+            if feature_store is not None:
+                feature_store = feature_store.extended(chunk)
+            chunk = score_frame(chunk, model, city_encoder, product_encoder, bundle["features"], feature_store)
+
+            if tmp_path:
+                chunk.to_csv(tmp_path, mode='a', header=not written, index=False)
+                written = True
+
+            part = chunk.groupby(GROUP_KEYS, observed=True)[AGG_COLUMNS].sum()
+            part['Rows'] = chunk.groupby(GROUP_KEYS, observed=True).size()
+            aggregates = part if aggregates is None else aggregates.add(part, fill_value=0)
+
+            chunk_min, chunk_max = chunk['Date'].min(), chunk['Date'].max()
+            min_date = chunk_min if min_date is None else min(min_date, chunk_min)
+            max_date = chunk_max if max_date is None else max(max_date, chunk_max)
+
+            rows += len(chunk)
+            if on_chunk:
+                on_chunk(chunks, rows)
+    except BaseException:
+        for path in (tmp_path, rejected_tmp):
+            if path and os.path.exists(path):
+                os.remove(path)
+        raise
+    if written:
+        os.replace(tmp_path, out_path)
+    if rejected_written:
+        os.replace(rejected_tmp, rejected_path)
+
+    if aggregates is None:
+        aggregates = pd.DataFrame(columns=GROUP_KEYS + AGG_COLUMNS + ['Rows'])
+    else:
+        aggregates[['Quantity', 'Rows']] = aggregates[['Quantity', 'Rows']].astype(int)
+        aggregates = aggregates.reset_index()
+
+    summary = {
+        "rows": rows,
+        "chunks": chunks,
+        "min_date": None if min_date is None else min_date.date().isoformat(),
+        "max_date": None if max_date is None else max_date.date().isoformat(),
+        "rejected": rejected,
+        "seconds": round(time.perf_counter() - start, 3),
+        "output": out_path if written else None,
+        "rejected_output": rejected_path if rejected_written else None,
+    }
+    return aggregates, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a large Walmart CSV in bounded memory.")
+    parser.add_argument("input", help="CSV or Parquet export to score")
+    parser.add_argument("--out", default="scored_output.csv", help="where to write the scored rows")
+    parser.add_argument("--aggregates", default=None, help="optional CSV for per City/Product totals")
+    parser.add_argument("--rejected", default=None, help="optional CSV for rows that failed validation")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args()
+
+    aggregates, summary = stream_score(
+        args.input, args.out, args.chunksize,
+        on_chunk=lambda n, rows: print(f"chunk {n}: {rows:,} rows scored", flush=True),
+        rejected_path=args.rejected,
+    )
+    if args.aggregates:
+        aggregates.to_csv(args.aggregates, index=False)
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# 🧪 Synthetic, schema-compatible Walmart data at any scale
+#
+# Produces the same columns as Cleaned_Walmart_Stock_Analysis.csv so every part of
+# the dashboard and the batch tools can be exercised at store-chain scale.
+# Rows are generated and written in chunks, so 10M rows never sit in memory.
+# City and product names start with the ones the shipped encoders know; asking for
+# more adds synthetic names ("City 013", "Product 045").
+#
+# Usage:
+#   python synth_data.py --rows 1000000 --out synthetic_1m.csv
+#   python synth_data.py --rows 10000 --cities 40 --products 200 --out wide.csv
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from model_registry import CITY_ENCODER_FILE, PRODUCT_ENCODER_FILE
+
+CHUNK_ROWS = 1_000_000
+START_DATE = "2019-01-01"
+COLUMNS = ['Date', 'Year', 'Month', 'Day', 'Weekday', 'City', 'Product line', 'Unit price',
+           'Quantity', 'Predicted Quantity', 'Current Stock', 'Gap to Fulfill']
+
+
+def _names(known, count, prefix):
+    names = list(known[:count])
+    names += [f"{prefix} {i:03d}" for i in range(len(names) + 1, count + 1)]
+    return np.array(names, dtype=object)
+
+
+def known_names():
+    import joblib
+    try:
+        return list(joblib.load(CITY_ENCODER_FILE).classes_), list(joblib.load(PRODUCT_ENCODER_FILE).classes_)
+    except FileNotFoundError:
+        return [], []
+
+
+def generate_chunk(rng, rows, cities, products, days):
+    dates = pd.Timestamp(START_DATE) + pd.to_timedelta(rng.integers(0, days, rows), unit="D")
+    dates = pd.DatetimeIndex(dates)
+    quantity = rng.integers(1, 100, rows)
+    predicted = np.round(quantity * rng.uniform(0.8, 1.6, rows) + rng.normal(10, 5, rows), 2)
+    stock = rng.integers(0, 150, rows)
+    return pd.DataFrame({
+        'Date': dates.strftime('%d-%m-%Y'),
+        'Year': dates.year,
+        'Month': dates.month,
+        'Day': dates.day,
+        'Weekday': dates.weekday,
+        'City': cities[rng.integers(0, len(cities), rows)],
+        'Product line': products[rng.integers(0, len(products), rows)],
+        'Unit price': np.round(rng.uniform(10, 100, rows), 2),
+        'Quantity': quantity,
+        'Predicted Quantity': predicted,
+        'Current Stock': stock,
+        'Gap to Fulfill': np.round(predicted - stock, 2),
+    }, columns=COLUMNS)
+
+
+# Write `rows` synthetic rows to `out`; returns the path
+def generate(out, rows, n_cities=12, n_products=30, days=365, seed=42, chunk_rows=CHUNK_ROWS):
+    known_cities, known_products = known_names()
+    cities = _names(known_cities, n_cities, "City")
+    products = _names(known_products, n_products, "Product")
+    rng = np.random.default_rng(seed)
+
+    tmp = out + ".tmp"
+    written = 0
+    while written < rows:
+        n = min(chunk_rows, rows - written)
+        generate_chunk(rng, n, cities, products, days).to_csv(tmp, mode='a' if written else 'w', header=not written, index=False)
+        written += n
+    os.replace(tmp, out)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate schema-compatible synthetic Walmart stock data.")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--cities", type=int, default=12)
+    parser.add_argument("--products", type=int, default=30)
+    parser.add_argument("--days", type=int, default=365, help="date span starting at 2019-01-01")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    out = args.out or f"synthetic_{args.rows}.csv"
+    generate(out, args.rows, args.cities, args.products, args.days, args.seed)
+    print(f"Wrote {args.rows:,} rows ({args.cities} cities x {args.products} products) to {out}")
+
+
+if __name__ == "__main__":
+    main()
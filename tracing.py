@@ -0,0 +1,195 @@
+# 📡 Lightweight hot-path tracing for dashboard reruns
+#
+# Named spans (`with span("predict"): ...`) feed per-page latency histograms, and
+# per-session counters track reruns and stage executions. Metrics are exported
+# periodically to a Prometheus textfile and a JSON file, and can be browsed on the
+# hidden admin page (views/admin.py).
+#
+# Tracing is off unless STOCK_TRACING=1. When off, `span()` returns one shared
+# no-op context manager, so an instrumented block costs a single function call.
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+ENABLED = os.environ.get("STOCK_TRACING", "0") == "1"
+EXPORT_DIR = os.environ.get("STOCK_TRACING_DIR", "metrics")
+EXPORT_INTERVAL_SECONDS = float(os.environ.get("STOCK_TRACING_EXPORT_INTERVAL", 10))
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_local = threading.local()  # Streamlit runs each session's rerun on its own thread
+_histograms = {}            # (page, span) -> _Histogram
+_session_counters = defaultdict(lambda: defaultdict(int))
+_last_export = 0.0
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        i = 0
+        while i < len(BUCKETS) and seconds > BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def span(name):
+    if not ENABLED:
+        return _NOOP
+    return _Span(name)
+
+
+def observe(name, seconds):
+    page = getattr(_local, "page", "-")
+    session = getattr(_local, "session", None)
+    with _lock:
+        hist = _histograms.get((page, name))
+        if hist is None:
+            hist = _histograms[(page, name)] = _Histogram()
+        hist.observe(seconds)
+        if session is not None:
+            _session_counters[session][name] += 1
+
+
+def incr(name, value=1):
+    if not ENABLED:
+        return
+    session = getattr(_local, "session", None)
+    if session is not None:
+        with _lock:
+            _session_counters[session][name] += value
+
+
+# Mark the start of a rerun for `page` in `session`
+def begin_rerun(page, session):
+    if not ENABLED:
+        return
+    _local.page = page
+    _local.session = session
+    _local.rerun_start = time.perf_counter()
+    incr("reruns")
+
+
+# Close the rerun span and export if the interval has passed
+def end_rerun():
+    global _last_export
+    if not ENABLED or getattr(_local, "rerun_start", None) is None:
+        return
+    observe("rerun", time.perf_counter() - _local.rerun_start)
+    _local.rerun_start = None
+    now = time.monotonic()
+    if now - _last_export >= EXPORT_INTERVAL_SECONDS:
+        _last_export = now
+        export()
+
+
+# `fn` wrapped to run as span `name` of the current page / session from
+# whichever thread calls it later (e.g. st.download_button's click-time callable)
+def deferred(name, fn):
+    if not ENABLED:
+        return fn
+    page, session = getattr(_local, "page", "-"), getattr(_local, "session", None)
+
+    def run():
+        outer = getattr(_local, "page", None), getattr(_local, "session", None)
+        _local.page, _local.session = page, session
+        try:
+            with _Span(name):
+                return fn()
+        finally:
+            _local.page, _local.session = outer
+
+    return run
+
+
+def snapshot():
+    with _lock:
+        spans = []
+        for (page, name), hist in sorted(_histograms.items()):
+            spans.append({
+                "page": page,
+                "span": name,
+                "count": hist.count,
+                "sum_seconds": hist.sum,
+                "mean_ms": 1000 * hist.sum / hist.count if hist.count else 0.0,
+                "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], hist.counts)),
+            })
+        sessions = {s: dict(c) for s, c in _session_counters.items()}
+    return {"enabled": ENABLED, "exported_at": time.time(), "spans": spans, "sessions": sessions}
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def prometheus_text(snap=None):
+    snap = snap or snapshot()
+    lines = [
+        "# HELP stock_dashboard_span_seconds Latency of named dashboard stages.",
+        "# TYPE stock_dashboard_span_seconds histogram",
+    ]
+    for s in snap["spans"]:
+        labels = f'page="{_label(s["page"])}",span="{_label(s["span"])}"'
+        cumulative = 0
+        for bound, count in s["buckets"].items():
+            cumulative += count
+            lines.append(f'stock_dashboard_span_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"stock_dashboard_span_seconds_sum{{{labels}}} {s['sum_seconds']:.6f}")
+        lines.append(f"stock_dashboard_span_seconds_count{{{labels}}} {s['count']}")
+    lines += [
+        "# HELP stock_dashboard_session_events_total Per-session counters.",
+        "# TYPE stock_dashboard_session_events_total counter",
+    ]
+    for session, counters in sorted(snap["sessions"].items()):
+        for name, value in sorted(counters.items()):
+            lines.append(f'stock_dashboard_session_events_total{{session="{_label(session)}",event="{_label(name)}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path, text):
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(path + ".tmp", path)
+
+
+# Write metrics/stock_dashboard.prom (node_exporter textfile format) and .json
+def export(directory=EXPORT_DIR):
+    os.makedirs(directory, exist_ok=True)
+    snap = snapshot()
+    _write_atomic(os.path.join(directory, "stock_dashboard.prom"), prometheus_text(snap))
+    _write_atomic(os.path.join(directory, "stock_dashboard.json"), json.dumps(snap, indent=2))
+    return directory
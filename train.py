@@ -0,0 +1,202 @@
+# 🏋️ Headless training pipeline with parallel hyperparameter search
+#
+# Replaces the notebook cells in Untitled*.ipynb. Candidates are fitted in a
+# process pool (one process per candidate, each forest using its share of the
+# cores via n_jobs), every candidate's fit time and MAE / RMSE / R² are reported,
+# and the winner is refitted on all rows and written as one versioned bundle:
+#
+#   artifacts/<version>/bundle.joblib   model + encoders + feature list + metadata
+#   artifacts/<version>/metadata.json   the same metadata, human readable
+#   artifacts/<version>/candidates.csv  the search results
+#   artifacts/LATEST                    name of the newest bundle (read by model_registry)
+#
+# Usage:
+#   python train.py                               # grid search on all cores
+#   python train.py --search random --n-iter 12   # random search
+#   python train.py --export-legacy               # also rewrite clean_*.pkl
+#   python train.py --demand-features             # add lag / rolling Quantity features
+#                                                 # (feature_store.py) and ship the store
+
+import argparse
+import datetime
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import ParameterGrid, ParameterSampler, train_test_split
+from sklearn.preprocessing import LabelEncoder
+
+from compact_schema import load_table
+from feature_store import DEMAND_FEATURES, FeatureStore
+from model_registry import BUNDLE_DIR, LATEST_FILE, CITY_ENCODER_FILE, PRODUCT_ENCODER_FILE, MODEL_FILE
+from scoring import FEATURES, add_features
+
+TARGET = 'Predicted Quantity'
+PARAM_SPACE = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [None, 12, 24],
+    'min_samples_leaf': [1, 2, 5],
+    'max_features': [1.0, 0.5, 'sqrt'],
+}
+
+# Training split, shared with pool workers once via the initializer
+_data = {}
+
+
+def _init_worker(X_train, X_test, y_train, y_test):
+    _data.update(X_train=X_train, X_test=X_test, y_train=y_train, y_test=y_test)
+
+
+def _evaluate(params, n_jobs, seed):
+    model = RandomForestRegressor(random_state=seed, n_jobs=n_jobs, **params)
+    start = time.perf_counter()
+    model.fit(_data['X_train'], _data['y_train'])
+    fit_seconds = time.perf_counter() - start
+    y_pred = model.predict(_data['X_test'])
+    return {
+        **params,
+        'fit_seconds': round(fit_seconds, 3),
+        'MAE': float(mean_absolute_error(_data['y_test'], y_pred)),
+        'RMSE': float(np.sqrt(mean_squared_error(_data['y_test'], y_pred))),
+        'R2': float(r2_score(_data['y_test'], y_pred)),
+    }
+
+
+def candidate_params(search, n_iter, seed):
+    if search == 'random':
+        return list(ParameterSampler(PARAM_SPACE, n_iter=n_iter, random_state=seed))
+    return list(ParameterGrid(PARAM_SPACE))
+
+
+# Fit LabelEncoders on the data and build the model's feature matrix
+def prepare(df, feature_store=None):
+    city_encoder = LabelEncoder().fit(df['City'].astype(str))
+    product_encoder = LabelEncoder().fit(df['Product line'].astype(str))
+    df = add_features(df, city_encoder, product_encoder, feature_store)
+    return df, city_encoder, product_encoder
+
+
+def search(X, y, params_list, workers, seed, test_size):
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=seed)
+    cores = os.cpu_count() or 1
+    workers = max(1, min(workers, len(params_list)))
+    n_jobs = max(1, cores // workers)
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(X_train, X_test, y_train, y_test)) as pool:
+        futures = [pool.submit(_evaluate, params, n_jobs, seed) for params in params_list]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results.append(result)
+            print(f"[{done}/{len(futures)}] fit {result['fit_seconds']:.2f}s  "
+                  f"MAE={result['MAE']:.3f}  RMSE={result['RMSE']:.3f}  R²={result['R2']:.4f}  "
+                  f"{ {k: result[k] for k in PARAM_SPACE} }", flush=True)
+    return sorted(results, key=lambda r: r['RMSE'])
+
+
+def write_bundle(out_dir, model, city_encoder, product_encoder, metadata, candidates, feature_store=None):
+    version = metadata['version']
+    bundle_dir = os.path.join(out_dir, version)
+    os.makedirs(bundle_dir, exist_ok=True)
+
+    bundle = {
+        'model': model,
+        'city_encoder': city_encoder,
+        'product_encoder': product_encoder,
+        'features': metadata['features'],
+        'feature_store': feature_store,
+        'metadata': metadata,
+    }
+    joblib.dump(bundle, os.path.join(bundle_dir, 'bundle.joblib'))
+    with open(os.path.join(bundle_dir, 'metadata.json'), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2, default=str)
+    candidates.to_csv(os.path.join(bundle_dir, 'candidates.csv'), index=False)
+
+    # Point LATEST at the new bundle atomically
+    latest = os.path.join(out_dir, LATEST_FILE)
+    with open(latest + '.tmp', 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(latest + '.tmp', latest)
+    return bundle_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the stock predictor and write a versioned artifact bundle.")
+    parser.add_argument("--data", default="Cleaned_Walmart_Stock_Analysis.csv")
+    parser.add_argument("--search", choices=["grid", "random"], default="grid")
+    parser.add_argument("--n-iter", type=int, default=10, help="candidates for random search")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="parallel candidate fits")
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=BUNDLE_DIR)
+    parser.add_argument("--export-legacy", action="store_true", help="also write clean_model.pkl and the clean_*_encoder.pkl files")
+    parser.add_argument("--demand-features", action="store_true", help="add lag / rolling Quantity features per City and Product line")
+    parser.add_argument("--history", action="store_true", help="with --demand-features, also fold in completed orders from days the data does not cover")
+    args = parser.parse_args()
+    if args.demand_features and args.export_legacy:
+        parser.error("--export-legacy writes the calendar-only model; it cannot be combined with --demand-features")
+
+    df = load_table(args.data)
+    features, feature_store = FEATURES, None
+    if args.demand_features:
+        feature_store = FeatureStore.from_frame(df)
+        if args.history:
+            from history_store import open_history
+            feature_store.update(open_history().read_all(), new_days_only=True)
+        features = FEATURES + DEMAND_FEATURES
+        print(f"Demand features from {feature_store.summary()}")
+
+    df, city_encoder, product_encoder = prepare(df, feature_store)
+    X, y = df[features], df[TARGET]
+
+    params_list = candidate_params(args.search, args.n_iter, args.seed)
+    print(f"Searching {len(params_list)} candidates on {len(df):,} rows with {args.workers} workers")
+    start = time.perf_counter()
+    results = search(X, y, params_list, args.workers, args.seed, args.test_size)
+    search_seconds = time.perf_counter() - start
+    candidates = pd.DataFrame(results)
+
+    best = results[0]
+    best_params = {k: best[k] for k in PARAM_SPACE}
+
+    start = time.perf_counter()
+    model = RandomForestRegressor(random_state=args.seed, n_jobs=-1, **best_params).fit(X, y)
+    refit_seconds = time.perf_counter() - start
+    model.set_params(n_jobs=None)  # single-threaded predict in the dashboard
+
+    metadata = {
+        'version': datetime.datetime.now().strftime('%Y%m%d-%H%M%S'),
+        'trained_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'data': os.path.abspath(args.data),
+        'rows': len(df),
+        'features': features,
+        'target': TARGET,
+        'params': best_params,
+        'holdout': {k: best[k] for k in ('MAE', 'RMSE', 'R2')},
+        'search': args.search,
+        'candidates': len(candidates),
+        'search_seconds': round(search_seconds, 2),
+        'refit_seconds': round(refit_seconds, 2),
+    }
+    if feature_store is not None:
+        metadata['feature_store'] = feature_store.summary()
+    bundle_dir = write_bundle(args.out, model, city_encoder, product_encoder, metadata, candidates, feature_store)
+    print(f"Best {best_params}: RMSE={best['RMSE']:.3f} R²={best['R2']:.4f}")
+    print(f"Bundle written to {bundle_dir}")
+
+    if args.export_legacy:
+        joblib.dump(model, MODEL_FILE)
+        joblib.dump(city_encoder, CITY_ENCODER_FILE)
+        joblib.dump(product_encoder, PRODUCT_ENCODER_FILE)
+        print(f"Legacy artifacts written to {MODEL_FILE}, {CITY_ENCODER_FILE}, {PRODUCT_ENCODER_FILE}")
+
+
+if __name__ == "__main__":
+    main()
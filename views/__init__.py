@@ -0,0 +1,27 @@
+# 🧭 Dashboard pages, imported on demand
+#
+# new.py only imports the module of the page that is selected, so the login
+# screen and the pages that don't work on the upload (Help, History, Admin)
+# never import plotly, scikit-learn or the scoring stack, and never load the
+# model. Each page module exposes `render(ws)`: pages that work on the upload
+# get a `workspace.Workspace` built from it (that is where the model is first
+# loaded), the STANDALONE ones are rendered with None.
+
+import importlib
+
+PAGES = {
+    "📁 Upload & Predict": "upload",
+    "📦 Pending Orders": "pending",
+    "🚨 Low Stock Alerts": "low_stock",
+    "🗃️ History": "history",
+    "📈 Analysis": "analysis",
+    "❓ Help & Demo": "help",
+}
+ADMIN_PAGE = "🛠️ Admin Metrics"
+MODULES = {**PAGES, ADMIN_PAGE: "admin"}
+STANDALONE = {"🗃️ History", "❓ Help & Demo", ADMIN_PAGE}
+
+
+# Page module for a sidebar label (imported on first use, then cached by Python)
+def load(page):
+    return importlib.import_module(f"{__name__}.{MODULES[page]}")
@@ -0,0 +1,22 @@
+# 🛠️ Hidden admin page (?admin=1, managers only)
+
+import pandas as pd
+import streamlit as st
+
+import tracing
+
+
+def render(ws):
+    st.title("🛠️ Dashboard Metrics")
+    if not tracing.ENABLED:
+        st.info("Tracing is off. Start the app with STOCK_TRACING=1 to collect metrics.")
+        return
+    snap = tracing.snapshot()
+    spans_df = pd.DataFrame(snap["spans"])
+    if not spans_df.empty:
+        st.subheader("⏱️ Span Latency by Page")
+        st.dataframe(spans_df.drop(columns=["buckets"]), use_container_width=True)
+    st.subheader("👥 Per-Session Counters")
+    st.dataframe(pd.DataFrame(snap["sessions"]).T.fillna(0), use_container_width=True)
+    if st.button("📤 Export Now"):
+        st.success(f"Metrics written to `{tracing.export()}/`")
@@ -0,0 +1,58 @@
+# 📈 Stock Analysis page (the only page that builds plotly figures, via chart_data)
+
+import streamlit as st
+
+from chart_data import demand_share_figure, trend_figure
+from tracing import span
+
+
+def render(ws):
+    cube = ws.cube
+    st.title("📈 Stock Analysis Dashboard")
+
+    st.subheader("🔍 Filter by City & Product")
+    col1, col2 = st.columns(2)
+
+    all_cities = cube.cities()
+    all_products = cube.products()
+    cities = col1.multiselect("🏙️ Cities", all_cities, default=all_cities)
+    products = col2.multiselect("🛍️ Products", all_products, default=all_products)
+
+    # 📊 Bar Chart - Needed vs Current Stock
+    st.subheader("📊 Needed vs Current Stock (Top 10 Products)")
+    with span("analysis_groupby"):
+        product_totals = cube.by_product(cities, products)
+    bar_df = product_totals.sort_values('Needed Stock', ascending=False).head(10)
+
+    if not bar_df.empty:
+        st.bar_chart(bar_df.set_index('Product line'))
+    else:
+        st.warning("No data to display in bar chart.")
+
+    # 🥧 Pie Chart - Product Demand Share (figures are cached per filters and data version)
+    st.subheader("🥧 Product Demand Share")
+    pie = demand_share_figure(cube, cities, products)
+
+    if pie is not None:
+        with span("plotly_render"):
+            st.plotly_chart(pie, use_container_width=True)
+    else:
+        st.warning("No data to display in pie chart.")
+
+    # 📆 Time-Based Trend Charts (long series downsampled with LTTB)
+    st.subheader("📆 Time-Based Trend Analysis")
+
+    for freq, label, missing in (
+        ('D', "📈 Daily Needed Stock Trend", "No daily trend data available."),
+        ('W', "📅 Weekly Needed Stock Trend", "No weekly trend data available."),
+        ('M', "🗓️ Monthly Needed Stock Trend", "No monthly trend data available."),
+    ):
+        with st.expander(label):
+            fig, points, shown = trend_figure(cube, cities, products, freq)
+            if fig is not None:
+                with span("plotly_render"):
+                    st.plotly_chart(fig, use_container_width=True)
+                if shown < points:
+                    st.caption(f"Showing {shown:,} of {points:,} points (shape-preserving downsample)")
+            else:
+                st.warning(missing)
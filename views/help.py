@@ -0,0 +1,7 @@
+# ❓ Help & Demo page (static; works without an upload)
+
+from help_demo import render_help_demo_page
+
+
+def render(ws):
+    render_help_demo_page()
@@ -0,0 +1,26 @@
+# 🗃️ Completed orders history (reads the history store; works without an upload)
+
+import streamlit as st
+
+from views.resources import get_history_store
+
+
+def render(ws):
+    st.title("🗃️ Completed Orders History")
+
+    history_store = get_history_store()
+    bounds = history_store.bounds()
+    if bounds:
+        min_date = bounds[0].date()
+        max_date = bounds[1].date()
+
+        date_range = st.date_input("📅 Filter by Completion Date", (min_date, max_date))
+        if isinstance(date_range, tuple) and len(date_range) == 2:
+            start_date, end_date = date_range
+            filtered_history = history_store.query_dates(start_date, end_date)
+            history_display = [col for col in filtered_history.columns if col not in ['Date', 'Year', 'Month', 'Day', 'Weekday']]
+            st.dataframe(filtered_history[history_display], use_container_width=True)
+        else:
+            st.warning("Please select a valid date range.")
+    else:
+        st.info("No completed records found yet.")
@@ -0,0 +1,31 @@
+# 🚨 Low Stock Alerts page
+
+import streamlit as st
+
+from alert_engine import Thresholds, save_thresholds
+
+
+def render(ws):
+    df, alerts = ws.df, ws.alerts
+    st.title("🚨 Low Stock Alerts")
+    alert_display = [col for col in df.columns if col not in ['Date', 'Year', 'Month', 'Day', 'Weekday']]
+
+    if alerts.low_count:
+        st.subheader(f"🧯 {alerts.low_count} Items Below Their Stock Threshold")
+        limit = st.selectbox("Show lowest", [50, 100, 500, 1000, "All"], index=1)
+        alert_df = df.loc[alerts.lowest_stock(None if limit == "All" else limit)]
+        st.dataframe(alert_df[alert_display], use_container_width=True)
+    else:
+        st.success("✅ No critical low-stock items right now!")
+
+    if alerts.high_count:
+        st.subheader("⚠️ Largest Gaps to Fulfill")
+        st.dataframe(df.loc[alerts.top_gaps(10)][alert_display], use_container_width=True)
+
+    # ⚙️ Per-City / Product thresholds ("*" matches any; blank cells fall through)
+    if st.session_state.get("role") == "manager":
+        with st.expander("⚙️ Alert Thresholds"):
+            edited_thresholds = st.data_editor(ws.thresholds.table(), num_rows="dynamic", hide_index=True, use_container_width=True)
+            if st.button("💾 Save Thresholds"):
+                save_thresholds(Thresholds.from_table(edited_thresholds))
+                st.rerun()
@@ -0,0 +1,92 @@
+# 📦 Pending Orders page: paginated editor for stock / status
+
+import datetime
+
+import streamlit as st
+
+from alert_engine import flag_alerts
+from notifier import alert_events
+from pending_editor import STATUS_OPTIONS, page_bounds, changed_rows
+from search_index import SearchIndex
+from views.resources import get_history_store, get_notifier
+
+
+def render(ws):
+    df, cache_key = ws.df, ws.cache_key
+    st.title("📦 Pending Orders Dashboard")
+
+    st.subheader("🔍 Search and Filter")
+    search_product = st.text_input("🔍 Product Contains")
+    search_city = st.text_input("🏙️ City Contains")
+
+    # Substring search resolved against distinct values, not every row
+    if st.session_state.get("search_index_key") != cache_key:
+        st.session_state.search_index = SearchIndex(df)
+        st.session_state.search_index_key = cache_key
+    match = st.session_state.search_index.match({'Product line': search_product, 'City': search_city})
+    filtered_df = df[match & (df['Status'] != "Completed").to_numpy()]
+
+    if not filtered_df.empty:
+        col1, col2 = st.columns(2)
+        page_size = col1.selectbox("Rows per page", [25, 50, 100, 250, 500, 1000], index=2)
+        n_pages = page_bounds(len(filtered_df), 1, page_size)[2]
+        page_no = col2.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1)
+        start, stop, _ = page_bounds(len(filtered_df), page_no, page_size)
+        st.markdown(f"Showing orders **{start + 1}–{stop}** of **{len(filtered_df)}** ⚡")
+
+        page_df = flag_alerts(filtered_df.iloc[start:stop], ws.thresholds)
+        editor_cols = ['Product line', 'City', 'Needed Stock', 'Current Stock', 'Gap to Fulfill', 'Status', 'Low Stock', 'High Gap']
+        editor_key = f"pending_editor_{cache_key[0]}_{page_size}_{page_no}"
+
+        edited_df = st.data_editor(
+            page_df[editor_cols],
+            key=editor_key,
+            hide_index=True,
+            use_container_width=True,
+            disabled=[col for col in editor_cols if col not in ('Current Stock', 'Status')],
+            column_config={
+                "Current Stock": st.column_config.NumberColumn(min_value=0, max_value=10000, step=1, required=True),
+                "Status": st.column_config.SelectboxColumn(options=STATUS_OPTIONS, required=True),
+                "Needed Stock": st.column_config.NumberColumn(format="%d"),
+                "Gap to Fulfill": st.column_config.NumberColumn(format="%d"),
+                "Low Stock": st.column_config.CheckboxColumn("🔴 Low", help="Below this City/Product's low-stock threshold"),
+                "High Gap": st.column_config.CheckboxColumn("⚠️ Gap", help="Above this City/Product's gap threshold"),
+            },
+        )
+
+        # Only rows whose stock/status actually changed are committed
+        changes = changed_rows(page_df, edited_df)
+        edited_alerts = flag_alerts(edited_df, ws.thresholds)
+        st.markdown(
+            f"✏️ **{len(changes)}** changed rows · "
+            f"🔴 **{int(edited_alerts['Low Stock'].sum())}** low stock · "
+            f"⚠️ **{int(edited_alerts['High Gap'].sum())}** high gap on this page"
+        )
+
+        if st.button("💾 Apply Changes", disabled=changes.empty):
+            completed_ids = changes.index[changes['Status'] == "Completed"]
+            if len(completed_ids):
+                completed_df = df.loc[completed_ids].copy()
+                completed_df['Current Stock'] = changes.loc[completed_ids, 'Current Stock'].astype(int)
+                completed_df['Gap to Fulfill'] = completed_df['Needed Stock'] - completed_df['Current Stock']
+                completed_df['Status'] = "Completed"
+                completed_df['Completed At'] = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                get_history_store().append(completed_df)
+
+            before = df.loc[changes.index]
+            after = before.copy()
+            after[changes.columns] = changes
+            after['Needed Stock'] = after['Predicted Quantity']
+            ws.cube.apply_delta(before, after)
+            get_notifier().notify(alert_events(after, ws.alerts.apply(after)))
+
+            ws.working.record(changes)
+            del st.session_state[editor_key]
+            st.rerun()
+
+    else:
+        st.warning("No pending records match your search. Try different filters.")
+
+    st.subheader("📋 Current Pending Inventory")
+    display_cols = [col for col in df.columns if col not in ['Date', 'Year', 'Month', 'Day', 'Weekday']]
+    st.dataframe(df[df['Status'] != "Completed"][display_cols], use_container_width=True)
@@ -0,0 +1,17 @@
+# 🔌 Process-wide services shared by the pages (created on first use)
+
+import streamlit as st
+
+
+# 🗃️ Append-only history store (imports stock_history.csv once on first start)
+@st.cache_resource
+def get_history_store():
+    from history_store import open_history
+    return open_history()
+
+
+# 📧 Alert digests: one background sender per process (off unless ALERT_RECIPIENTS is set)
+@st.cache_resource
+def get_notifier():
+    from notifier import AlertNotifier
+    return AlertNotifier().start()
@@ -0,0 +1,49 @@
+# 🌊 Streaming mode (multi-GB exports): scored chunk by chunk straight to disk
+
+import os
+
+import pandas as pd
+import streamlit as st
+
+from csv_ingest import IngestError
+from stream_scoring import stream_score
+
+
+# Read at click time, so the report is not loaded on every rerun
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def render(uploaded_file):
+    st.title("🌊 Streaming Score")
+    st.info("Large files are scored chunk by chunk and written to disk; only totals are shown here.")
+    chunksize = st.number_input("Rows per chunk", min_value=10_000, max_value=1_000_000, value=100_000, step=10_000)
+
+    if st.button("▶️ Start Scoring"):
+        os.makedirs("scored_output", exist_ok=True)
+        out_path = os.path.join("scored_output", f"scored_{os.path.basename(uploaded_file.name)}")
+        rejected_path = os.path.join("scored_output", f"rejected_{os.path.basename(uploaded_file.name)}")
+        progress = st.empty()
+        uploaded_file.seek(0)
+        try:
+            aggregates, summary = stream_score(
+                uploaded_file, out_path, int(chunksize),
+                on_chunk=lambda n, rows: progress.markdown(f"⏳ Chunk {n}: **{rows:,}** rows scored"),
+                rejected_path=rejected_path,
+            )
+        except IngestError as exc:
+            progress.error(f"❌ {uploaded_file.name} can't be used: {exc}")
+            return
+        progress.success(f"✅ Scored {summary['rows']:,} rows in {summary['seconds']}s → `{out_path}`")
+        if summary["rejected"]:
+            st.warning(f"⚠️ {summary['rejected']:,} rows of {uploaded_file.name} failed validation and were left out "
+                       f"(listed in `{rejected_path}`).")
+            with st.expander("🧾 Rejected rows"):
+                # Only the first rows are loaded; the report on disk can be as large as the input
+                st.dataframe(pd.read_csv(rejected_path, nrows=1000), use_container_width=True)
+                st.download_button("⬇️ Download rejection report", lambda path=rejected_path: _read(path),
+                                   "rejected_rows.csv", "text/csv")
+        st.subheader("📊 Totals by City & Product")
+        st.dataframe(aggregates, use_container_width=True)
+        st.download_button("💾 Download Totals", aggregates.to_csv(index=False), "stream_totals.csv", "text/csv")
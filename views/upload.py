@@ -0,0 +1,19 @@
+# 📁 Upload & Predict page
+
+import pandas as pd
+import streamlit as st
+
+from compact_schema import memory_mb
+from model_registry import artifact_stats
+from prediction_cache import prediction_cache
+
+
+def render(ws):
+    st.title("📁 Uploaded Data with Predictions")
+    st.success("✅ Predictions successfully generated using ML model.")
+    st.dataframe(ws.df, use_container_width=True)
+
+    with st.expander("🧠 Model Artifacts"):
+        st.dataframe(pd.DataFrame(artifact_stats()), use_container_width=True)
+        st.json(prediction_cache.stats())
+        st.caption(f"🗜️ Working set: {memory_mb(ws.df):.2f} MB in memory")
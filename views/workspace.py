@@ -0,0 +1,115 @@
+# 🧰 Per-upload working set shared by the data pages
+#
+# Scores the upload once per session (the model is loaded here on first use)
+# into a working_set.WorkingSet, and keeps the alert engine and inventory cube
+# for it in st.session_state, keyed so they are only rebuilt when the upload,
+# the model or the thresholds change.
+
+import streamlit as st
+
+from alert_engine import AlertEngine, load_thresholds
+from category_encoder import unseen_values
+from compact_schema import compact
+from csv_ingest import IngestError, read_upload
+from inventory_cube import InventoryCube
+from model_registry import artifacts_version, load_bundle
+from prediction_cache import content_hash, prediction_cache
+from sharded_scoring import score_sharded
+from tracing import span
+from working_set import WorkingSet, checkpoint_path
+
+
+class Workspace:
+    def __init__(self, working, thresholds, alerts, cube):
+        self.working = working
+        self.df = working.frame
+        self.cache_key = working.key
+        self.thresholds = thresholds
+        self.alerts = alerts
+        self.cube = cube
+
+
+# Scored, prepared frame for this session: built once per upload/model, with
+# edits recorded in its delta log (and recovered from disk after a restart)
+def _working_set(uploaded_file):
+    upload_bytes = uploaded_file.getvalue()
+    upload_hash = content_hash(upload_bytes)
+    cache_key = (upload_hash, artifacts_version())
+    working = st.session_state.get("working_set")
+    if working is not None and working.key == cache_key:
+        return working
+
+    # ✅ Predict using ML model — cached by (upload contents, model version), so
+    # a new session on an already-scored file skips feature engineering and
+    # inference. Large uploads are scored in per-city shards across a process pool.
+    # The upload's rejection report is cached in the same entry, so the two are
+    # always evicted together.
+    def score_upload():
+        with span("csv_ingest"):
+            frame, rejected = read_upload(upload_bytes, uploaded_file.name)
+        scored = score_sharded(frame)
+        return compact(scored), rejected
+
+    with span("prediction_cache"):
+        df, rejected = prediction_cache.get_or_compute(cache_key, score_upload)
+
+    # 🏷️ Cities / products the model never saw are scored with a reserved code
+    with span("load_bundle"):
+        bundle = load_bundle()
+    with span("working_set_build"):
+        working = WorkingSet(df, cache_key, checkpoint_path(st.session_state.get("username"), upload_hash),
+                             unseen=unseen_values(df, bundle), rejected=rejected)
+    st.session_state.working_set = working
+    return working
+
+
+def open_workspace(uploaded_file):
+    try:
+        working = _working_set(uploaded_file)
+    except IngestError as exc:
+        st.error(f"❌ {uploaded_file.name} can't be used: {exc}")
+        st.stop()
+    cache_key = working.key
+
+    if working.unseen:
+        details = "; ".join(f"{col}: {', '.join(counts.index[:5])}" + (" …" if len(counts) > 5 else "") for col, counts in working.unseen.items())
+        st.warning(f"⚠️ {sum(int(c.sum()) for c in working.unseen.values())} rows mention values not seen in training ({details}). "
+                   "They were scored with a generic 'unknown' code, so treat those predictions with care.")
+    if working.rejected is not None and len(working.rejected):
+        rejected = working.rejected
+        st.warning(f"⚠️ {len(rejected)} rows of {uploaded_file.name} failed validation and were left out.")
+        with st.expander("🧾 Rejected rows"):
+            st.dataframe(rejected.head(1000), use_container_width=True)
+            st.download_button("⬇️ Download rejection report", lambda: rejected.to_csv(index=False).encode("utf-8"),
+                               "rejected_rows.csv", "text/csv")
+    if working.recovered:
+        st.sidebar.caption(f"♻️ Restored your edits to {working.recovered} rows of this file")
+
+    # ✏️ Current state: edits applied on the Pending Orders page are folded in here
+    df = working.frame
+
+    # 🚨 Alert engine: per-SKU thresholds, scored once per upload/model/thresholds
+    # and kept in step with applied edits
+    thresholds = load_thresholds()
+    alerts_key = (cache_key, thresholds.version)
+    if st.session_state.get("alert_engine_key") != alerts_key:
+        with span("alerts_build"):
+            st.session_state.alert_engine = AlertEngine(df, thresholds)
+        st.session_state.alert_engine_key = alerts_key
+    alerts = st.session_state.alert_engine
+
+    # 🔔 Sidebar Summary
+    with st.sidebar.expander("🚨 Alerts Summary"):
+        st.markdown(f"🔴 **Low Stock Items**: {alerts.low_count}")
+        st.markdown(f"⚠️ **High Gap Items**: {alerts.high_count}")
+        st.caption(f"Default thresholds: stock < {thresholds.low:g}, gap > {thresholds.gap:g}")
+
+    # 🧊 Inventory cube for the Analysis page: built once per upload/model, then
+    # kept in step with applied edits
+    if st.session_state.get("inventory_cube_key") != cache_key:
+        with span("cube_build"):
+            st.session_state.inventory_cube = InventoryCube(df)
+        st.session_state.inventory_cube_key = cache_key
+    cube = st.session_state.inventory_cube
+
+    return Workspace(working, thresholds, alerts, cube)
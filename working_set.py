@@ -0,0 +1,146 @@
+# 🧮 Session working set: the scored upload plus a delta log of edits
+#
+# The dashboard used to rebuild its frame on every rerun: copy the scored upload
+# out of the prediction cache, recreate Status / stock columns and replay every
+# edit made so far. A WorkingSet is prepared once per session and upload, and
+# pages read `working.frame` directly.
+#
+# Edits from the Pending Orders page are appended to a delta log
+# (row id -> {column: value}) and only folded into the frame the next time it
+# is read, touching just the edited rows. Every record() is also appended as one
+# JSON line to a checkpoint file per (user, upload), so after a server restart
+# the same user re-uploading the same file gets their edits back. The checkpoint
+# is rewritten as a single merged line once it grows past COMPACT_EVERY lines.
+
+import json
+import os
+import re
+import uuid
+
+import pandas as pd
+
+from file_lock import locked
+
+CHECKPOINT_DIR = os.environ.get("WORKING_SET_DIR", "working_sets")
+COMPACT_EVERY = 200  # checkpoint lines before they are merged into one
+
+
+def checkpoint_path(user, upload_hash, root=CHECKPOINT_DIR):
+    safe_user = re.sub(r"[^\w\-]+", "_", str(user or "anonymous"))
+    return os.path.join(root, safe_user, f"{upload_hash}.jsonl")
+
+
+def _plain(value):
+    return value.item() if hasattr(value, "item") else value
+
+
+# Stock / status columns every page expects, derived once from a scored frame
+def prepare(df):
+    if 'Status' not in df.columns:
+        df['Status'] = 'Pending'
+    if 'Current Stock' not in df.columns:
+        df['Current Stock'] = 0
+    df['Current Stock'] = df['Current Stock'].astype(int)
+    df['Needed Stock'] = df['Predicted Quantity']
+    df['Gap to Fulfill'] = df['Needed Stock'] - df['Current Stock']
+    return df
+
+
+class WorkingSet:
+    def __init__(self, df, key, path=None, unseen=None, rejected=None):
+        self.key = key                # (upload hash, model version) the frame was scored for
+        self.path = path              # checkpoint file, or None for memory only
+        self.unseen = unseen or {}    # column -> counts of values scored with the unknown code
+        self.rejected = rejected      # csv_ingest rejection report of the upload, or None
+        self.token = uuid.uuid4().hex
+        self.edits = {}               # row id -> {column: value}, every edit so far
+        self.version = 0              # number of record() calls, including recovered ones
+        self.recovered = 0            # edited rows restored from the checkpoint
+        self._frame = prepare(df)
+        self._log = []                # deltas not yet folded into _frame
+        self._lines = 0               # lines in the checkpoint file
+        if path:
+            self._recover()
+
+    # Identifies the current contents of `frame` (e.g. as an export cache version)
+    @property
+    def data_version(self):
+        return (self.token, self.version)
+
+    # Current state: the scored upload with every recorded edit applied
+    @property
+    def frame(self):
+        if self._log:
+            pending = {}
+            for delta in self._log:
+                for row_id, values in delta.items():
+                    pending.setdefault(row_id, {}).update(values)
+            self._log = []
+            self._apply(pending)
+        return self._frame
+
+    def _apply(self, rows):
+        df = self._frame
+        edits = pd.DataFrame.from_dict(rows, orient='index')
+        edits = edits[edits.index.isin(df.index)]
+        for col in edits.columns:
+            values = edits[col].dropna()
+            if not values.empty:
+                df.loc[values.index, col] = values.astype(df[col].dtype)
+        df.loc[edits.index, 'Gap to Fulfill'] = df.loc[edits.index, 'Needed Stock'] - df.loc[edits.index, 'Current Stock']
+
+    # Append edited rows (index = row ids, columns = changed fields) to the log
+    def record(self, changes):
+        delta = {row_id: {col: _plain(value) for col, value in values.items()}
+                 for row_id, values in changes.to_dict(orient='index').items()}
+        if not delta:
+            return
+        self._log.append(delta)
+        for row_id, values in delta.items():
+            self.edits.setdefault(row_id, {}).update(values)
+        self.version += 1
+        if self.path:
+            self._checkpoint(delta)
+
+    def _checkpoint(self, delta):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with locked(self.path):
+            if self._lines >= COMPACT_EVERY:
+                # Merge what is on disk (other tabs of the same user may have appended)
+                merged = {}
+                for logged in self._read() + [delta]:
+                    for row_id, values in logged.items():
+                        merged.setdefault(row_id, {}).update(values)
+                with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+                    f.write(json.dumps(list(merged.items())) + "\n")
+                os.replace(self.path + ".tmp", self.path)
+                self._lines = 1
+            else:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(list(delta.items())) + "\n")
+                self._lines += 1
+
+    # Deltas in the checkpoint file (caller holds the lock)
+    def _read(self):
+        if not os.path.exists(self.path):
+            return []
+        deltas = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    deltas.append({row_id: values for row_id, values in json.loads(line)})
+                except (ValueError, TypeError):
+                    continue  # a line cut short by a crash
+        return deltas
+
+    def _recover(self):
+        if not os.path.exists(self.path):
+            return
+        with locked(self.path):
+            deltas = self._read()
+        for delta in deltas:
+            self._log.append(delta)
+            for row_id, values in delta.items():
+                self.edits.setdefault(row_id, {}).update(values)
+        self.version = self._lines = len(deltas)
+        self.recovered = len(self.edits)